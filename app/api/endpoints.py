@@ -1,28 +1,80 @@
 from __future__ import annotations
 
+import json
+from datetime import datetime
 from typing import List
+from typing import Literal
 from uuid import UUID
 
 from fastapi import APIRouter
+from fastapi import BackgroundTasks
 from fastapi import Depends
+from fastapi import File
+from fastapi import Form
 from fastapi import HTTPException
+from fastapi import Query
 from fastapi import status
+from fastapi import UploadFile
 from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import embedding_cache
+from app.cache import semantic_cache
+from app.core import settings
+from app.db import async_engine
 from app.db import AuditLog
+from app.db import COLLECTION_NAME_PATTERN
+from app.db import DEFAULT_COLLECTION
+from app.db import describe_vector_index
 from app.db import get_db_session
+from app.db import get_pool_stats
+from app.db import get_read_db_session
+from app.db import rebuild_vector_index
+from app.schemas import AuditFeedbackInput
+from app.schemas import AuditFeedbackStats
+from app.schemas import AuditLatencyStats
 from app.schemas import AuditLogOutput
+from app.schemas import AuditLogPage
+from app.schemas import AuditRequestStats
+from app.schemas import AuditWriterStats
+from app.schemas import ChatCoalescingStats
 from app.schemas import ChatInput
-from app.schemas import DocumentMetadataOutput
+from app.schemas import ChatSessionOutput
+from app.schemas import ChatTurnOutput
+from app.schemas import CollectionInput
+from app.schemas import CollectionOutput
+from app.schemas import DbPoolStats
+from app.schemas import DocumentListPage
 from app.schemas import DocumentUploadRequest
+from app.schemas import EmbeddingCacheStats
 from app.schemas import GeneralStatusResponse
+from app.schemas import IngestionJobOutput
+from app.schemas import SemanticCacheStats
+from app.schemas import SourceSummary
+from app.schemas import VectorIndexStatus
+from app.services import audit_log_writer
+from app.services import audit_service
 from app.services import chat_service
+from app.services import collection_service
+from app.services import ingestion_job_manager
 from app.services import knowledge_service
+from app.services import session_service
 
 router = APIRouter()
 
+CollectionQuery = Query(
+    default=DEFAULT_COLLECTION, pattern=COLLECTION_NAME_PATTERN,
+)
+
+
+async def _require_collection(db: AsyncSession, collection: str) -> None:
+    if await collection_service.get_collection(db, collection) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Collection {collection} not found.',
+        )
+
 
 @router.post(
     '/knowledge/update',
@@ -38,14 +90,137 @@ async def update_knowledge(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail='No documents provided.',
         )
+    await _require_collection(db, request.collection)
+
+    try:
+        summary = await knowledge_service.upsert_documents(
+            request.documents,
+            db,
+            collection=request.collection,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e),
+        )
+    return GeneralStatusResponse(
+        status='success',
+        detail=f'Successfully added {summary.inserted} document chunks '
+        f'({summary.embedded} newly embedded, {summary.reused_embeddings} '
+        f'reused), kept {summary.unchanged} unchanged, updated '
+        f'{summary.updated} and removed {summary.deleted} stale chunks.',
+    )
+
+
+@router.post(
+    '/knowledge/upload',
+    response_model=IngestionJobOutput,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=['Knowledge Base'],
+)
+async def upload_knowledge_file(
+    file: UploadFile = File(...),
+    source_id: str | None = Form(default=None),
+    metadata: str | None = Form(default=None),
+    collection: str = Form(
+        default=DEFAULT_COLLECTION, pattern=COLLECTION_NAME_PATTERN,
+    ),
+    chunk_size: int | None = Form(default=None, ge=1),
+    chunk_overlap: int | None = Form(default=None, ge=0),
+    db: AsyncSession = Depends(get_db_session),
+):
+    # The body is streamed to disk by the multipart parser and handed to a
+    # background worker, so the request returns as soon as the upload is
+    # stored instead of waiting for embedding.
+    try:
+        doc_metadata = json.loads(metadata) if metadata else None
+    except ValueError:
+        doc_metadata = None
+    if metadata and not isinstance(doc_metadata, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='metadata must be a JSON object.',
+        )
+    await _require_collection(db, collection)
 
-    created_ids = await knowledge_service.upsert_documents(
-        request.documents,
+    return await ingestion_job_manager.submit(
         db,
+        file.file,
+        file.filename,
+        source_id=source_id or file.filename,
+        metadata=doc_metadata or {'source': file.filename},
+        collection=collection,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
     )
+
+
+@router.get(
+    '/knowledge/jobs',
+    response_model=List[IngestionJobOutput],
+    tags=['Knowledge Base'],
+)
+async def list_ingestion_jobs(
+    limit: int = Query(default=20, ge=1, le=200),
+    db: AsyncSession = Depends(get_db_session),
+):
+    return await ingestion_job_manager.list_recent(db, limit=limit)
+
+
+@router.get(
+    '/knowledge/jobs/{job_id}',
+    response_model=IngestionJobOutput,
+    tags=['Knowledge Base'],
+)
+async def get_ingestion_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    job = await ingestion_job_manager.get(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Ingestion job {job_id} not found.',
+        )
+    return job
+
+
+@router.post(
+    '/knowledge/jobs/{job_id}/cancel',
+    response_model=IngestionJobOutput,
+    tags=['Knowledge Base'],
+)
+async def cancel_ingestion_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    job = await ingestion_job_manager.cancel(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Ingestion job {job_id} not found.',
+        )
+    if job.status in ('succeeded', 'failed'):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f'Ingestion job {job_id} already {job.status}.',
+        )
+    return job
+
+
+@router.delete(
+    '/knowledge/all',
+    response_model=GeneralStatusResponse,
+    tags=['Knowledge Base'],
+)
+async def delete_all_knowledge(
+    collection: str = CollectionQuery,
+    db: AsyncSession = Depends(get_db_session),
+):
+    await _require_collection(db, collection)
+    await collection_service.clear_collection(db, collection)
     return GeneralStatusResponse(
         status='success',
-        detail=f'Successfully added {len(created_ids)} document chunks.',
+        detail=f'Deleted all document chunks in collection {collection}.',
     )
 
 
@@ -56,9 +231,12 @@ async def update_knowledge(
 )
 async def delete_knowledge(
     doc_id: UUID,
+    collection: str = CollectionQuery,
     db: AsyncSession = Depends(get_db_session),
 ):
-    deleted = await knowledge_service.delete_document(doc_id, db)
+    deleted = await knowledge_service.delete_document(
+        doc_id, db, collection=collection,
+    )
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -72,24 +250,92 @@ async def delete_knowledge(
 
 @router.get(
     '/knowledge',
-    response_model=List[DocumentMetadataOutput],
+    response_model=DocumentListPage,
     tags=['Knowledge Base'],
 )
-async def get_knowledge_list(db: AsyncSession = Depends(get_db_session)):
-    documents = await knowledge_service.list_documents(db)
-    return documents
+async def get_knowledge_list(
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = None,
+    source_id: str | None = None,
+    collection: str = CollectionQuery,
+    db: AsyncSession = Depends(get_read_db_session),
+):
+    try:
+        return await knowledge_service.list_documents(
+            db,
+            limit=limit,
+            cursor=cursor,
+            source_id=source_id,
+            collection=collection,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e),
+        )
+
+
+@router.get(
+    '/knowledge/sources',
+    response_model=List[SourceSummary],
+    tags=['Knowledge Base'],
+)
+async def get_knowledge_sources(
+    collection: str = CollectionQuery,
+    db: AsyncSession = Depends(get_read_db_session),
+):
+    return await knowledge_service.summarize_sources(db, collection)
+
+
+@router.get(
+    '/collections',
+    response_model=List[CollectionOutput],
+    tags=['Collections'],
+)
+async def list_collections(db: AsyncSession = Depends(get_db_session)):
+    return await collection_service.list_collections(db)
+
+
+@router.post(
+    '/collections',
+    response_model=CollectionOutput,
+    status_code=status.HTTP_201_CREATED,
+    tags=['Collections'],
+)
+async def create_collection(
+    request: CollectionInput,
+    db: AsyncSession = Depends(get_db_session),
+):
+    collection = await collection_service.create_collection(db, request.name)
+    if collection is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f'Collection {request.name} already exists.',
+        )
+    return collection
 
 
 @router.delete(
-    '/knowledge/all',
+    '/collections/{name}',
     response_model=GeneralStatusResponse,
-    tags=['Knowledge Base'],
+    tags=['Collections'],
 )
-async def delete_all_knowledge(db: AsyncSession = Depends(get_db_session)):
-    deleted_count = await knowledge_service.delete_all_documents(db)
+async def drop_collection(
+    name: str,
+    db: AsyncSession = Depends(get_db_session),
+):
+    try:
+        dropped = await collection_service.drop_collection(db, name)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e),
+        )
+    if not dropped:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Collection {name} not found.',
+        )
     return GeneralStatusResponse(
-        status='success',
-        detail=f'Deleted all successfully {deleted_count} document chunks.',
+        status='success', detail=f'Collection {name} dropped.',
     )
 
 
@@ -98,8 +344,191 @@ async def chat_with_knowledge_base(
     request: ChatInput,
     db: AsyncSession = Depends(get_db_session),
 ):
-    generator = chat_service.stream_chat(request.question, request.history, db)
-    return StreamingResponse(generator, media_type='text/plain')
+    await _require_collection(db, request.collection)
+    headers = {}
+    if request.session_id is not None:
+        if await session_service.get_session(db, request.session_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f'Chat session {request.session_id} not found.',
+            )
+        headers['X-Session-Id'] = str(request.session_id)
+    await db.rollback()
+
+    generator = chat_service.stream_chat(
+        request.question,
+        request.history,
+        db,
+        ef_search=request.ef_search,
+        probes=request.probes,
+        bypass_cache=request.bypass_cache,
+        retrieval_mode=request.retrieval_mode,
+        filters=request.filters,
+        session_id=request.session_id,
+        collection=request.collection,
+    )
+    return StreamingResponse(
+        generator, media_type='text/plain', headers=headers,
+    )
+
+
+@router.post(
+    '/chat/sessions',
+    response_model=ChatSessionOutput,
+    status_code=status.HTTP_201_CREATED,
+    tags=['Chat'],
+)
+async def create_chat_session(db: AsyncSession = Depends(get_db_session)):
+    session = await session_service.create_session(db)
+    return ChatSessionOutput(session_id=session.id)
+
+
+@router.get(
+    '/chat/sessions/{session_id}',
+    response_model=ChatSessionOutput,
+    tags=['Chat'],
+)
+async def get_chat_session(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    session = await session_service.get_session(db, session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Chat session {session_id} not found.',
+        )
+    turns = await session_service.list_turns(db, session_id)
+    return ChatSessionOutput(
+        session_id=session.id,
+        summary=session.summary,
+        summarized_turns=session.summarized_turns,
+        turns=[ChatTurnOutput.model_validate(turn) for turn in turns],
+    )
+
+
+@router.delete(
+    '/chat/sessions/{session_id}',
+    response_model=GeneralStatusResponse,
+    tags=['Chat'],
+)
+async def delete_chat_session(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db_session),
+):
+    if not await session_service.delete_session(db, session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Chat session {session_id} not found.',
+        )
+    return GeneralStatusResponse(
+        status='success',
+        detail=f'Chat session {session_id} deleted.',
+    )
+
+
+@router.get('/audit', response_model=AuditLogPage, tags=['Audit'])
+async def list_audit_logs(
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    feedback: str | None = None,
+    db: AsyncSession = Depends(get_read_db_session),
+):
+    try:
+        return await audit_service.list_logs(
+            db,
+            limit=limit,
+            cursor=cursor,
+            since=since,
+            until=until,
+            feedback=feedback,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e),
+        )
+
+
+@router.get(
+    '/audit/stats/latency',
+    response_model=AuditLatencyStats,
+    tags=['Audit'],
+)
+async def get_audit_latency_stats(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_read_db_session),
+):
+    try:
+        return await audit_service.latency_stats(db, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e),
+        )
+
+
+@router.get(
+    '/audit/stats/requests',
+    response_model=AuditRequestStats,
+    tags=['Audit'],
+)
+async def get_audit_request_stats(
+    interval: Literal['minute', 'hour', 'day'] = 'hour',
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_read_db_session),
+):
+    try:
+        return await audit_service.request_stats(
+            db, interval=interval, since=since, until=until,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e),
+        )
+
+
+@router.get(
+    '/audit/stats/feedback',
+    response_model=AuditFeedbackStats,
+    tags=['Audit'],
+)
+async def get_audit_feedback_stats(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_read_db_session),
+):
+    try:
+        return await audit_service.feedback_stats(
+            db, since=since, until=until,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e),
+        )
+
+
+@router.post(
+    '/audit/{chat_id}/feedback',
+    response_model=GeneralStatusResponse,
+    tags=['Audit'],
+)
+async def submit_audit_feedback(
+    chat_id: UUID,
+    request: AuditFeedbackInput,
+    db: AsyncSession = Depends(get_db_session),
+):
+    if not await audit_service.set_feedback(db, chat_id, request.feedback):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Audit log with chat_id {chat_id} not found.',
+        )
+    return GeneralStatusResponse(
+        status='success',
+        detail=f'Feedback recorded for chat {chat_id}.',
+    )
 
 
 @router.get('/audit/{chat_id}', response_model=AuditLogOutput, tags=['Audit'])
@@ -118,3 +547,101 @@ async def get_audit_log(
             detail=f'Audit log with chat_id {chat_id} not found.',
         )
     return log
+
+
+@router.get(
+    '/admin/vector-index',
+    response_model=VectorIndexStatus,
+    tags=['Admin'],
+)
+async def get_vector_index_status(db: AsyncSession = Depends(get_db_session)):
+    index = await describe_vector_index(db) or {}
+    return VectorIndexStatus(
+        index_type=settings.VECTOR_INDEX_TYPE,
+        storage=settings.VECTOR_STORAGE,
+        **index,
+    )
+
+
+@router.post(
+    '/admin/vector-index/rebuild',
+    response_model=GeneralStatusResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=['Admin'],
+)
+async def rebuild_vector_index_endpoint(background_tasks: BackgroundTasks):
+    background_tasks.add_task(rebuild_vector_index, async_engine)
+    return GeneralStatusResponse(
+        status='accepted',
+        detail=f'Rebuilding {settings.VECTOR_INDEX_TYPE} vector index '
+        'concurrently.',
+    )
+
+
+@router.get(
+    '/admin/embedding-cache',
+    response_model=EmbeddingCacheStats,
+    tags=['Admin'],
+)
+async def get_embedding_cache_stats():
+    return EmbeddingCacheStats(**embedding_cache.stats())
+
+
+@router.delete(
+    '/admin/embedding-cache',
+    response_model=GeneralStatusResponse,
+    tags=['Admin'],
+)
+async def clear_embedding_cache():
+    embedding_cache.clear()
+    purged = await embedding_cache.purge_expired()
+    return GeneralStatusResponse(
+        status='success',
+        detail=f'In-process cache cleared; purged {purged} expired '
+        'persistent entries.',
+    )
+
+
+@router.get(
+    '/admin/semantic-cache',
+    response_model=SemanticCacheStats,
+    tags=['Admin'],
+)
+async def get_semantic_cache_stats():
+    return SemanticCacheStats(**semantic_cache.stats())
+
+
+@router.delete(
+    '/admin/semantic-cache',
+    response_model=GeneralStatusResponse,
+    tags=['Admin'],
+)
+async def clear_semantic_cache(db: AsyncSession = Depends(get_db_session)):
+    await semantic_cache.invalidate(db)
+    await db.commit()
+    return GeneralStatusResponse(
+        status='success', detail='Semantic cache cleared.',
+    )
+
+
+@router.get(
+    '/admin/audit-writer',
+    response_model=AuditWriterStats,
+    tags=['Admin'],
+)
+async def get_audit_writer_stats():
+    return AuditWriterStats(**audit_log_writer.stats())
+
+
+@router.get(
+    '/admin/chat-coalescing',
+    response_model=ChatCoalescingStats,
+    tags=['Admin'],
+)
+async def get_chat_coalescing_stats():
+    return ChatCoalescingStats(**chat_service.stats())
+
+
+@router.get('/admin/db/pool', response_model=DbPoolStats, tags=['Admin'])
+async def get_db_pool_stats():
+    return DbPoolStats(**get_pool_stats())
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from .embedding_cache import CachedEmbeddings
+from .embedding_cache import embedding_cache
+from .embedding_cache import EmbeddingCache
+from .semantic_cache import semantic_cache
+from .semantic_cache import SemanticCache
+
+__all__ = [
+    'CachedEmbeddings',
+    'EmbeddingCache',
+    'embedding_cache',
+    'SemanticCache',
+    'semantic_cache',
+]
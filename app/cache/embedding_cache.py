@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timedelta
+
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import delete
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.db import EmbeddingCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    return ' '.join(unicodedata.normalize('NFKC', text).split()).casefold()
+
+
+class EmbeddingCache:
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: int,
+        persistent: bool = False,
+        enabled: bool = True,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.enabled = enabled
+        self._entries: OrderedDict[str, tuple[float, list[float]]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text: str, model: str) -> str:
+        payload = f'{model}\x00{normalize_text(text)}'
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _get_local(self, key: str) -> list[float] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, embedding = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return embedding
+
+    def _set_local(self, key: str, embedding: list[float]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _get_persistent(self, key: str) -> list[float] | None:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(EmbeddingCacheEntry.embedding).where(
+                    EmbeddingCacheEntry.cache_key == key,
+                    EmbeddingCacheEntry.created_at >= cutoff,
+                ),
+            )
+            embedding = result.scalar_one_or_none()
+        return None if embedding is None else [float(x) for x in embedding]
+
+    async def _set_persistent(
+        self, key: str, model: str, embedding: list[float],
+    ) -> None:
+        stmt = insert(EmbeddingCacheEntry).values(
+            cache_key=key,
+            model=model,
+            embedding=embedding,
+            created_at=datetime.utcnow(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EmbeddingCacheEntry.cache_key],
+            set_={
+                'embedding': stmt.excluded.embedding,
+                'created_at': stmt.excluded.created_at,
+            },
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    async def get(self, text: str, model: str) -> list[float] | None:
+        if not self.enabled:
+            return None
+
+        key = self.make_key(text, model)
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self.hits += 1
+            return embedding
+
+        if self.persistent:
+            # The shared tier is an optimisation only; a database hiccup
+            # must never fail the chat request that asked for the vector.
+            try:
+                embedding = await self._get_persistent(key)
+            except Exception as e:
+                logger.warning('Embedding cache lookup failed: %s', e)
+            if embedding is not None:
+                self.persistent_hits += 1
+                self._set_local(key, embedding)
+                return embedding
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, model: str, embedding: list[float]) -> None:
+        if not self.enabled:
+            return
+
+        key = self.make_key(text, model)
+        self._set_local(key, embedding)
+
+        if self.persistent:
+            try:
+                await self._set_persistent(key, model, embedding)
+            except Exception as e:
+                logger.warning('Embedding cache write failed: %s', e)
+
+    async def purge_expired(self) -> int:
+        if not self.persistent:
+            return 0
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(EmbeddingCacheEntry).where(
+                    EmbeddingCacheEntry.created_at < cutoff,
+                ),
+            )
+            await db.commit()
+        return result.rowcount
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float | bool]:
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'persistent': self.persistent,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'persistent_hits': self.persistent_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (
+                (self.hits + self.persistent_hits) / lookups
+                if lookups else 0.0
+            ),
+        }
+
+
+class CachedEmbeddings(Embeddings):
+
+    def __init__(
+        self, embeddings: Embeddings, model: str, cache: EmbeddingCache,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        embedding = await self.cache.get(text, self.model)
+        if embedding is not None:
+            return embedding
+
+        embedding = await self.embeddings.aembed_query(text)
+        await self.cache.set(text, self.model, embedding)
+        return embedding
+
+
+embedding_cache = EmbeddingCache(
+    max_size=settings.EMBEDDING_CACHE_MAX_SIZE,
+    ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+    persistent=settings.EMBEDDING_CACHE_PERSISTENT,
+    enabled=settings.EMBEDDING_CACHE_ENABLED,
+)
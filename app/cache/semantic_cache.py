@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.db import Collection
+from app.db import DEFAULT_COLLECTION
+from app.db import SemanticCacheEntry
+
+
+class SemanticCache:
+
+    def __init__(
+        self, threshold: float, ttl_seconds: int, enabled: bool = True,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.stale_skips = 0
+        self.invalidations = 0
+        self._iterative_scan: bool | None = None
+
+    def _cutoff(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+
+    async def _use_iterative_scan(self, db: AsyncSession) -> bool:
+        # Iterative index scans arrived in pgvector 0.8; older versions
+        # reject the setting, so they take the prefilter plan instead.
+        if settings.VECTOR_FILTER_STRATEGY != 'iterative':
+            return False
+        if self._iterative_scan is None:
+            version = (
+                await db.execute(
+                    text(
+                        'SELECT extversion FROM pg_extension '
+                        "WHERE extname = 'vector'",
+                    ),
+                )
+            ).scalar_one()
+            major, minor = (int(part) for part in version.split('.')[:2])
+            self._iterative_scan = (major, minor) >= (0, 8)
+        return self._iterative_scan
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        question_embedding: list[float],
+        collection: str = DEFAULT_COLLECTION,
+    ) -> dict[str, Any] | None:
+        # The collection and TTL predicates are applied after the HNSW
+        # scan, which on its own only yields ef_search candidates; entries
+        # of other collections can crowd out every match. Both strategies
+        # mirror document retrieval.
+        entries = select(SemanticCacheEntry).where(
+            SemanticCacheEntry.collection == collection,
+            SemanticCacheEntry.created_at >= self._cutoff(),
+        )
+        if await self._use_iterative_scan(db):
+            # Keeps scanning the index until a row passes the filter;
+            # strict order keeps LIMIT 1 exact.
+            await db.execute(
+                text('SET LOCAL hnsw.iterative_scan = strict_order'),
+            )
+            entry = SemanticCacheEntry
+        else:
+            # Collects the collection's live entries through the
+            # (collection, created_at) index and ranks them exactly;
+            # OFFSET 0 keeps the ORDER BY off the HNSW index.
+            entry = aliased(
+                SemanticCacheEntry, entries.offset(0).subquery(),
+            )
+            entries = select(entry)
+
+        distance = entry.question_embedding.cosine_distance(
+            question_embedding,
+        )
+        result = await db.execute(
+            entries.with_only_columns(
+                entry.response,
+                entry.retrieved_docs,
+                entry.created_at,
+                (1 - distance).label('similarity'),
+            )
+            .order_by(distance)
+            .limit(1),
+        )
+        row = result.mappings().first()
+
+        if row is None or row['similarity'] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return dict(row)
+
+    async def generation(
+        self, db: AsyncSession, collection: str = DEFAULT_COLLECTION,
+    ) -> int | None:
+        result = await db.execute(
+            select(Collection.cache_generation).where(
+                Collection.name == collection,
+            ),
+        )
+        return result.scalar_one_or_none()
+
+    async def store(
+        self,
+        db: AsyncSession,
+        question: str,
+        question_embedding: list[float],
+        response: str,
+        retrieved_docs: list[dict[str, Any]],
+        collection: str = DEFAULT_COLLECTION,
+        generation: int | None = None,
+    ) -> bool:
+        # The answer is only kept if the knowledge base has not changed
+        # since retrieval. The shared row lock waits for an invalidation in
+        # progress, which bumps the generation before it empties the cache.
+        current = (
+            await db.execute(
+                select(Collection.cache_generation)
+                .where(Collection.name == collection)
+                .with_for_update(read=True),
+            )
+        ).scalar_one_or_none()
+        if current is None or current != generation:
+            await db.rollback()
+            self.stale_skips += 1
+            return False
+
+        await db.execute(
+            delete(SemanticCacheEntry).where(
+                SemanticCacheEntry.created_at < self._cutoff(),
+            ),
+        )
+        db.add(
+            SemanticCacheEntry(
+                collection=collection,
+                question=question,
+                question_embedding=question_embedding,
+                response=response,
+                retrieved_docs=retrieved_docs,
+            ),
+        )
+        await db.commit()
+        self.stores += 1
+        return True
+
+    async def invalidate(
+        self, db: AsyncSession, collection: str | None = None,
+    ) -> None:
+        # Runs inside the caller's transaction so the cache is emptied
+        # atomically with the knowledge base change that made it stale. The
+        # generation is bumped first: its row lock makes a concurrent store
+        # wait and then see the new value.
+        bump = update(Collection).values(
+            cache_generation=Collection.cache_generation + 1,
+        )
+        stmt = delete(SemanticCacheEntry)
+        if collection is not None:
+            bump = bump.where(Collection.name == collection)
+            stmt = stmt.where(SemanticCacheEntry.collection == collection)
+        await db.execute(bump)
+        await db.execute(stmt)
+        self.invalidations += 1
+
+    def record_bypass(self) -> None:
+        self.bypassed += 1
+
+    def stats(self) -> dict[str, int | float | bool]:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'stores': self.stores,
+            'stale_skips': self.stale_skips,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+semantic_cache = SemanticCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    enabled=settings.SEMANTIC_CACHE_ENABLED,
+)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import AsyncIterator
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from .config import settings
+
+
+@lru_cache(maxsize=32)
+def _get_splitter(
+    chunk_size: int, chunk_overlap: int,
+) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+    )
+
+
+def split_text(content: str, chunk_size: int, chunk_overlap: int) -> list[str]:
+    return _get_splitter(chunk_size, chunk_overlap).split_text(content)
+
+
+class ChunkingPool:
+    # Splitting is pure Python and CPU bound, so large documents are fanned
+    # out to worker processes to keep the event loop free for chat streams.
+    # This module only depends on the config, which keeps the spawned
+    # workers cheap to start.
+
+    def __init__(self, workers: int | None, inline_max_chars: int):
+        self.workers = workers
+        self.inline_max_chars = inline_max_chars
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._executor
+
+    async def split_many(
+        self, documents: list[tuple[str, int, int]],
+    ) -> AsyncIterator[list[str]]:
+        # Takes (content, chunk_size, chunk_overlap) per document. All
+        # documents are submitted up front and their chunks yielded in input
+        # order, so callers can number chunks while later documents are
+        # still being split. Only the first inline_max_chars characters of
+        # the whole batch are split inline, however small each document is.
+        loop = asyncio.get_running_loop()
+        inline_budget = self.inline_max_chars
+        pending = []
+        for content, size, overlap in documents:
+            if len(content) <= inline_budget:
+                inline_budget -= len(content)
+                pending.append(split_text(content, size, overlap))
+            else:
+                pending.append(
+                    loop.run_in_executor(
+                        self._get_executor(),
+                        split_text,
+                        content,
+                        size,
+                        overlap,
+                    ),
+                )
+
+        try:
+            for result in pending:
+                yield (
+                    await result if isinstance(result, asyncio.Future)
+                    else result
+                )
+        finally:
+            for result in pending:
+                if isinstance(result, asyncio.Future):
+                    result.cancel()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+chunking_pool = ChunkingPool(
+    workers=settings.CHUNKING_WORKERS,
+    inline_max_chars=settings.CHUNKING_INLINE_MAX_CHARS,
+)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
 
@@ -7,10 +9,116 @@ from pydantic_settings import SettingsConfigDict
 class Settings(BaseSettings):
     DATABASE_URL: str
     API_URL: str
-    GEMINI_API_KEY: str
+    GEMINI_API_KEY: str = ''
     EMBEDDING_MODEL: str
     LLM_MODEL: str
 
+    LOG_LEVEL: Literal['DEBUG', 'INFO', 'WARNING', 'ERROR'] = 'INFO'
+    LOG_FORMAT: Literal['text', 'json'] = 'text'
+
+    # 'fake' swaps Gemini for deterministic local stand-ins, used for load
+    # testing and benchmarks without spending API quota.
+    EMBEDDING_PROVIDER: Literal['google', 'fake'] = 'google'
+    LLM_PROVIDER: Literal['google', 'fake'] = 'google'
+    FAKE_EMBEDDING_LATENCY_MS: float = 0.0
+    FAKE_LLM_TTFT_MS: float = 200.0
+    FAKE_LLM_TOKEN_LATENCY_MS: float = 20.0
+    FAKE_LLM_RESPONSE_TOKENS: int = 50
+
+    DATABASE_REPLICA_URL: str | None = None
+    DATABASE_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DOCUMENT_INSERT_METHOD: Literal['copy', 'executemany'] = 'copy'
+    DOCUMENT_INSERT_BATCH_SIZE: int = 1000
+
+    # Upper bound on chunks in the prompt; fewer are used when they do not
+    # fit CONTEXT_TOKEN_BUDGET or, in vector mode, score below
+    # CONTEXT_MIN_SIMILARITY.
+    RETRIEVAL_TOP_K: int = 8
+    CONTEXT_TOKEN_BUDGET: int = 1500
+    CONTEXT_MIN_SIMILARITY: float = 0.25
+    RETRIEVAL_MODE: Literal['vector', 'hybrid'] = 'vector'
+    HYBRID_CANDIDATES: int = 40
+    RRF_K: int = 60
+    # Maximal marginal relevance: MMR_FETCH_K candidates are fetched and
+    # RETRIEVAL_TOP_K of them kept. MMR_LAMBDA = 1 ranks purely by
+    # relevance, lower values favour chunks unlike those already picked.
+    MMR_ENABLED: bool = True
+    MMR_FETCH_K: int = 20
+    MMR_LAMBDA: float = 0.5
+
+    VECTOR_INDEX_TYPE: Literal['hnsw', 'ivfflat', 'none'] = 'hnsw'
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    HNSW_EF_SEARCH: int = 40
+    IVFFLAT_LISTS: int = 100
+    IVFFLAT_PROBES: int = 10
+    VECTOR_FILTER_STRATEGY: Literal['iterative', 'prefilter'] = 'iterative'
+    # 'halfvec' and 'bit' index a compact copy of each embedding (requires
+    # pgvector >= 0.7) and re-rank VECTOR_RERANK_CANDIDATES index hits with
+    # full-precision distances.
+    VECTOR_STORAGE: Literal['vector', 'halfvec', 'bit'] = 'vector'
+    VECTOR_RERANK_CANDIDATES: int = 100
+
+    EMBEDDING_BATCH_SIZE: int = 100
+    EMBEDDING_CONCURRENCY: int = 4
+    EMBEDDING_MAX_RETRIES: int = 5
+    EMBEDDING_RETRY_BASE_DELAY: float = 1.0
+
+    # Query embeddings requested within the window are sent to the provider
+    # as one batch, flushed early once the batch is full.
+    EMBEDDING_QUERY_BATCHING_ENABLED: bool = True
+    EMBEDDING_QUERY_BATCH_WINDOW_MS: float = 5.0
+    EMBEDDING_QUERY_BATCH_MAX_SIZE: int = 32
+
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_SIZE: int = 10000
+    EMBEDDING_CACHE_TTL_SECONDS: int = 86400
+    EMBEDDING_CACHE_PERSISTENT: bool = False
+
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_TTL_SECONDS: int = 86400
+
+    # Identical chat requests arriving while one is being answered share
+    # its graph run and token stream instead of starting their own.
+    CHAT_COALESCING_ENABLED: bool = True
+
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 100
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_WRITE_MAX_RETRIES: int = 3
+    AUDIT_WRITE_TIMEOUT_SECONDS: float = 10.0
+    # audit_logs is partitioned by day. Partitions are created
+    # AUDIT_PARTITIONS_AHEAD_DAYS in advance and dropped once older than
+    # AUDIT_RETENTION_DAYS (0 keeps them forever).
+    AUDIT_RETENTION_DAYS: int = 90
+    AUDIT_PARTITIONS_AHEAD_DAYS: int = 7
+    AUDIT_MAINTENANCE_INTERVAL_SECONDS: float = 3600.0
+
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 100
+    # None lets the process pool size itself to the number of CPUs.
+    CHUNKING_WORKERS: int | None = None
+    CHUNKING_INLINE_MAX_CHARS: int = 20000
+
+    INGESTION_WORKERS: int = 2
+    INGESTION_SPOOL_DIR: str = '/tmp/kb_uploads'
+    INGESTION_PROGRESS_INTERVAL_SECONDS: float = 1.0
+    INGESTION_LEASE_SECONDS: float = 60.0
+    # Names the spool a job's upload sits in; only processes with the same
+    # owner pick the job up again. Defaults to the host name. Replicas that
+    # mount one shared INGESTION_SPOOL_DIR should all set the same value.
+    INGESTION_SPOOL_OWNER: str | None = None
+
+    HISTORY_TOKEN_BUDGET: int = 2000
+    HISTORY_MIN_RECENT_TURNS: int = 1
+    SESSION_SUMMARY_MAX_WORDS: int = 250
+
     model_config = SettingsConfigDict(env_file='.env')
 
 
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from .config import settings
+
+_TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    'message', 'asctime',
+}
+
+
+class JsonFormatter(logging.Formatter):
+    # Emits one JSON object per record; anything passed through ``extra``
+    # becomes a top-level field so log pipelines can index it.
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'timestamp': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update({
+            key: value for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES
+        })
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging() -> None:
+    handler = logging.StreamHandler()
+    if settings.LOG_FORMAT == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(_TEXT_FORMAT))
+
+    # Only the application's own loggers are configured; uvicorn keeps its
+    # own handlers and format.
+    logger = logging.getLogger('app')
+    logger.handlers[:] = [handler]
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.propagate = False
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from prometheus_client import Counter
+from prometheus_client import Histogram
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.core import REGISTRY
+
+from app.db import get_pool_stats
+
+_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+CHAT_STAGE_SECONDS = Histogram(
+    'kb_chat_stage_seconds',
+    'Duration of each stage of a chat request.',
+    ['stage'],
+    buckets=_LATENCY_BUCKETS,
+)
+CHAT_GRAPH_RUNS = Counter(
+    'kb_chat_graph_runs_total',
+    'Chat graph runs started; coalesced requests share one run.',
+)
+CHAT_COALESCED_REQUESTS = Counter(
+    'kb_chat_coalesced_requests_total',
+    'Chat requests attached to an identical in-flight graph run.',
+)
+CHAT_LLM_CALLS_SAVED = Counter(
+    'kb_chat_llm_calls_saved_total',
+    'LLM generations avoided by coalescing identical chat requests.',
+)
+CHAT_RUN_SUBSCRIBERS = Histogram(
+    'kb_chat_run_subscribers',
+    'Chat requests served by each graph run.',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+AUDIT_WRITE_SECONDS = Histogram(
+    'kb_audit_write_seconds',
+    'Duration of audit log batch inserts.',
+    buckets=_LATENCY_BUCKETS,
+)
+AUDIT_WRITE_BATCH_SIZE = Histogram(
+    'kb_audit_write_batch_size',
+    'Number of audit log rows per batch insert.',
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+INGESTION_SECONDS = Histogram(
+    'kb_ingestion_seconds',
+    'Duration of knowledge base upserts.',
+    buckets=_LATENCY_BUCKETS,
+)
+INGESTION_CHUNKS = Counter(
+    'kb_ingestion_chunks_total',
+    'Chunks processed by knowledge base upserts, by outcome.',
+    ['outcome'],
+)
+EMBEDDING_RETRIES = Counter(
+    'kb_embedding_retries_total',
+    'Embedding batches retried after a rate limit or transient error.',
+)
+
+EMBEDDING_QUERY_BATCH_SIZE = Histogram(
+    'kb_embedding_query_batch_size',
+    'Query texts per batched embedding call.',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+EMBEDDING_QUERY_QUEUE_SECONDS = Histogram(
+    'kb_embedding_query_queue_seconds',
+    'Time a query embedding waited for its batch to be sent.',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+
+def observe_stage_timings(timings: dict[str, float]) -> None:
+    for stage, elapsed_ms in timings.items():
+        CHAT_STAGE_SECONDS.labels(stage).observe(elapsed_ms / 1000)
+
+
+class PoolStatsCollector:
+    # Reads the pool counters at scrape time instead of mirroring every
+    # checkout into a metric.
+
+    _GAUGES = {
+        'size': 'Configured pool size.',
+        'checked_in': 'Idle connections in the pool.',
+        'checked_out': 'Connections currently in use.',
+        'overflow': 'Connections open beyond the pool size.',
+        'avg_wait_ms': 'Average time spent waiting for a connection.',
+        'max_wait_ms': 'Longest time spent waiting for a connection.',
+    }
+    _COUNTERS = {
+        'checkouts': 'Connections checked out of the pool.',
+        'timeouts': 'Checkouts that timed out waiting for a connection.',
+    }
+
+    def collect(self):
+        gauges = {
+            name: GaugeMetricFamily(
+                f'kb_db_pool_{name}', doc, labels=['engine'],
+            )
+            for name, doc in self._GAUGES.items()
+        }
+        counters = {
+            name: CounterMetricFamily(
+                f'kb_db_pool_{name}', doc, labels=['engine'],
+            )
+            for name, doc in self._COUNTERS.items()
+        }
+
+        for engine, stats in get_pool_stats().items():
+            if stats is None:
+                continue
+            for name, family in {**gauges, **counters}.items():
+                family.add_metric([engine], stats[name])
+
+        yield from gauges.values()
+        yield from counters.values()
+
+
+REGISTRY.register(PoolStatsCollector())
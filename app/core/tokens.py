@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text, which is close
+    # enough for budgeting without a tokenizer round trip to the provider.
+    return len(text) // 4 + 1
@@ -1,17 +1,63 @@
 from __future__ import annotations
 
+from .bulk import bulk_insert_documents
 from .models import AuditLog
 from .models import Base
+from .models import ChatSession
+from .models import ChatTurn
+from .models import Collection
 from .models import Document
+from .models import EmbeddingCacheEntry
+from .models import IngestionJob
+from .models import SemanticCacheEntry
+from .partitions import build_deferred_index
+from .partitions import COLLECTION_NAME_PATTERN
+from .partitions import create_partition
+from .partitions import DEFAULT_COLLECTION
+from .partitions import detach_partition
+from .partitions import drop_partition
+from .partitions import maintain_audit_partitions
+from .partitions import truncate_partition
+from .session import async_engine
 from .session import AsyncSessionLocal
 from .session import create_tables_on_startup
 from .session import get_db_session
+from .session import get_pool_stats
+from .session import get_read_db_session
+from .session import read_engine
+from .session import ReadSessionLocal
+from .vector_index import apply_search_params
+from .vector_index import describe_vector_index
+from .vector_index import rebuild_vector_index
 
 __all__ = [
     'Base',
     'Document',
     'AuditLog',
+    'EmbeddingCacheEntry',
+    'SemanticCacheEntry',
+    'ChatSession',
+    'ChatTurn',
+    'Collection',
+    'IngestionJob',
     'AsyncSessionLocal',
+    'ReadSessionLocal',
+    'read_engine',
+    'bulk_insert_documents',
+    'async_engine',
     'create_tables_on_startup',
     'get_db_session',
+    'get_read_db_session',
+    'get_pool_stats',
+    'COLLECTION_NAME_PATTERN',
+    'DEFAULT_COLLECTION',
+    'create_partition',
+    'build_deferred_index',
+    'truncate_partition',
+    'detach_partition',
+    'drop_partition',
+    'maintain_audit_partitions',
+    'apply_search_params',
+    'describe_vector_index',
+    'rebuild_vector_index',
 ]
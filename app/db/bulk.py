@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime
+from typing import Any
+
+from pgvector.asyncpg import register_vector
+from sqlalchemy import insert
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Document
+from app.db.partitions import DEFAULT_COLLECTION
+
+DOCUMENT_COPY_COLUMNS = [
+    'id',
+    'collection',
+    'content',
+    'embedding',
+    'doc_metadata',
+    'created_at',
+    'source_id',
+    'chunk_index',
+    'content_hash',
+    'size',
+]
+
+
+def _prepare_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # COPY bypasses ORM column defaults, so they are filled in up front.
+    now = datetime.utcnow()
+    prepared = []
+    for row in rows:
+        row = {column: row.get(column) for column in DOCUMENT_COPY_COLUMNS}
+        row['id'] = row['id'] or uuid.uuid4()
+        row['created_at'] = row['created_at'] or now
+        row['collection'] = row['collection'] or DEFAULT_COLLECTION
+        if row['size'] is None:
+            row['size'] = len(row['content'])
+        prepared.append(row)
+    return prepared
+
+
+async def _copy_documents(
+    driver_connection: Any, rows: list[dict[str, Any]],
+) -> None:
+    # The binary vector codec is only registered for the duration of the
+    # COPY: everywhere else vectors are bound as text by SQLAlchemy and the
+    # pgvector type, which the binary codec would reject.
+    await register_vector(driver_connection)
+    try:
+        await driver_connection.copy_records_to_table(
+            Document.__tablename__,
+            columns=DOCUMENT_COPY_COLUMNS,
+            records=[
+                tuple(
+                    json.dumps(row[column]) if column == 'doc_metadata'
+                    else row[column]
+                    for column in DOCUMENT_COPY_COLUMNS
+                )
+                for row in rows
+            ],
+        )
+    finally:
+        await driver_connection.reset_type_codec('vector', schema='public')
+
+
+async def bulk_insert_documents(
+    db: AsyncSession,
+    rows: list[dict[str, Any]],
+    batch_size: int | None = None,
+    method: str | None = None,
+) -> list[uuid.UUID]:
+    batch_size = batch_size or settings.DOCUMENT_INSERT_BATCH_SIZE
+    method = method or settings.DOCUMENT_INSERT_METHOD
+    rows = _prepare_rows(rows)
+
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    if not hasattr(driver_connection, 'copy_records_to_table'):
+        method = 'executemany'
+    elif not driver_connection.is_in_transaction():
+        # The asyncpg adapter only issues BEGIN before its first statement;
+        # without this a COPY sent straight to the driver would autocommit
+        # outside the session's transaction.
+        await connection.execute(text('SELECT 1'))
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if method == 'copy':
+            await _copy_documents(driver_connection, batch)
+        else:
+            await db.execute(insert(Document), batch)
+
+    return [row['id'] for row in rows]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# ``Base.metadata.create_all`` only creates missing tables, so columns and
+# indexes added to existing tables are applied here. Every statement must be
+# idempotent because the list is replayed on each startup.
+SCHEMA_UPGRADES = [
+    'ALTER TABLE documents ADD COLUMN IF NOT EXISTS source_id TEXT',
+    'ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_index INTEGER',
+    # Every insert sets content_hash and size, so only rows older than the
+    # column need a value. The backfill runs together with adding the
+    # column, rather than scanning the whole table on every startup.
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'documents' AND column_name = 'content_hash'
+        ) THEN
+            ALTER TABLE documents ADD COLUMN content_hash VARCHAR(64);
+            UPDATE documents SET content_hash =
+                encode(sha256(convert_to(content, 'UTF8')), 'hex');
+        END IF;
+    END $$
+    """,
+    'CREATE INDEX IF NOT EXISTS ix_documents_source_id '
+    'ON documents (source_id)',
+    'CREATE INDEX IF NOT EXISTS ix_documents_content_hash '
+    'ON documents (content_hash)',
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'documents' AND column_name = 'size'
+        ) THEN
+            ALTER TABLE documents ADD COLUMN size INTEGER;
+            UPDATE documents SET size = char_length(content);
+        END IF;
+    END $$
+    """,
+    'CREATE INDEX IF NOT EXISTS ix_documents_created_at_id '
+    'ON documents (created_at, id)',
+    'CREATE INDEX IF NOT EXISTS ix_documents_source_id_created_at_id '
+    'ON documents (source_id, created_at, id)',
+    'ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_tsv tsvector '
+    "GENERATED ALWAYS AS (to_tsvector('english', content)) STORED",
+    'CREATE INDEX IF NOT EXISTS ix_documents_content_tsv '
+    'ON documents USING gin (content_tsv)',
+    # The USING clause forces a table rewrite even when the column already
+    # is jsonb, so the conversion only runs while it is still plain json.
+    """
+    DO $$
+    BEGIN
+        IF (
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'documents' AND column_name = 'doc_metadata'
+        ) = 'json' THEN
+            ALTER TABLE documents
+            ALTER COLUMN doc_metadata TYPE jsonb USING doc_metadata::jsonb;
+        END IF;
+    END $$
+    """,
+    'CREATE INDEX IF NOT EXISTS ix_documents_doc_metadata '
+    'ON documents USING gin (doc_metadata jsonb_path_ops)',
+    'ALTER TABLE audit_logs ADD COLUMN IF NOT EXISTS stage_timings JSON',
+    'ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS chunk_size INTEGER',
+    'ALTER TABLE ingestion_jobs '
+    'ADD COLUMN IF NOT EXISTS chunk_overlap INTEGER',
+    'ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS collection TEXT '
+    "NOT NULL DEFAULT 'default'",
+    'ALTER TABLE semantic_cache ADD COLUMN IF NOT EXISTS collection TEXT '
+    "NOT NULL DEFAULT 'default'",
+    'CREATE INDEX IF NOT EXISTS ix_semantic_cache_collection_created_at '
+    'ON semantic_cache (collection, created_at)',
+    'ALTER TABLE collections ADD COLUMN IF NOT EXISTS cache_generation '
+    'BIGINT NOT NULL DEFAULT 0',
+    'ALTER TABLE ingestion_jobs '
+    'ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP',
+    'ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS spool_owner TEXT',
+]
+
+
+async def apply_schema_upgrades(conn: AsyncConnection) -> None:
+    for statement in SCHEMA_UPGRADES:
+        await conn.execute(text(statement))
@@ -4,11 +4,21 @@ import uuid
 from datetime import datetime
 
 from pgvector.sqlalchemy import Vector
+from sqlalchemy import BigInteger
+from sqlalchemy import Boolean
 from sqlalchemy import Column
+from sqlalchemy import Computed
 from sqlalchemy import DateTime
 from sqlalchemy import Float
+from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import Integer
 from sqlalchemy import JSON
+from sqlalchemy import String
 from sqlalchemy import Text
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base
 
@@ -17,21 +27,166 @@ Base = declarative_base()
 
 class Document(Base):
     __tablename__ = 'documents'
+    __table_args__ = (
+        Index('ix_documents_created_at_id', 'created_at', 'id'),
+        Index(
+            'ix_documents_source_id_created_at_id',
+            'source_id',
+            'created_at',
+            'id',
+        ),
+        Index(
+            'ix_documents_content_tsv',
+            'content_tsv',
+            postgresql_using='gin',
+        ),
+        Index(
+            'ix_documents_doc_metadata',
+            'doc_metadata',
+            postgresql_using='gin',
+            postgresql_ops={'doc_metadata': 'jsonb_path_ops'},
+        ),
+        # One partition per collection (see app.db.partitions); the
+        # partition key has to be part of the primary key.
+        {'postgresql_partition_by': 'LIST (collection)'},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    collection = Column(Text, primary_key=True, server_default='default')
     content = Column(Text, nullable=False)
     embedding = Column(Vector(768))
-    doc_metadata = Column(JSON)
+    doc_metadata = Column(JSONB)
     created_at = Column(DateTime, default=datetime.utcnow)
+    source_id = Column(Text, index=True)
+    chunk_index = Column(Integer)
+    content_hash = Column(String(64), index=True)
+    size = Column(Integer)
+    content_tsv = Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', content)", persisted=True),
+    )
+
+
+class Collection(Base):
+    __tablename__ = 'collections'
+
+    name = Column(Text, primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped whenever the collection's knowledge changes; semantic cache
+    # answers produced under an older generation are not stored.
+    cache_generation = Column(
+        BigInteger, nullable=False, default=0, server_default='0',
+    )
 
 
 class AuditLog(Base):
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        Index('ix_audit_logs_timestamp_chat_id', 'timestamp', 'chat_id'),
+        # One partition per day (see app.db.partitions), so retention drops
+        # whole tables instead of deleting rows.
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
 
     chat_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     question = Column(Text, nullable=False)
     response = Column(Text, nullable=False)
     retrieved_docs = Column(JSON)
     latency_ms = Column(Float, nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    stage_timings = Column(JSON)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)
     feedback = Column(Text, nullable=True)
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = 'embedding_cache'
+
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(Text, nullable=False)
+    embedding = Column(Vector(768), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class SemanticCacheEntry(Base):
+    __tablename__ = 'semantic_cache'
+    __table_args__ = (
+        Index(
+            'semantic_cache_embedding_idx',
+            'question_embedding',
+            postgresql_using='hnsw',
+            postgresql_ops={'question_embedding': 'vector_cosine_ops'},
+        ),
+        Index(
+            'ix_semantic_cache_collection_created_at',
+            'collection',
+            'created_at',
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    collection = Column(Text, nullable=False, server_default='default')
+    question = Column(Text, nullable=False)
+    question_embedding = Column(Vector(768), nullable=False)
+    response = Column(Text, nullable=False)
+    retrieved_docs = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ChatSession(Base):
+    __tablename__ = 'chat_sessions'
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    summary = Column(Text)
+    # Turns with turn_index below this value are folded into the summary.
+    summarized_turns = Column(Integer, nullable=False, default=0)
+    turn_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ChatTurn(Base):
+    __tablename__ = 'chat_turns'
+    __table_args__ = (
+        UniqueConstraint('session_id', 'turn_index'),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    session_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('chat_sessions.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    turn_index = Column(Integer, nullable=False)
+    question = Column(Text, nullable=False)
+    response = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class IngestionJob(Base):
+    __tablename__ = 'ingestion_jobs'
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # queued -> running -> succeeded | failed | cancelled
+    status = Column(String(16), nullable=False, default='queued', index=True)
+    source_id = Column(Text)
+    collection = Column(Text, nullable=False, server_default='default')
+    filename = Column(Text)
+    file_path = Column(Text)
+    spool_owner = Column(Text)
+    size_bytes = Column(Integer)
+    doc_metadata = Column(JSONB)
+    chunk_size = Column(Integer)
+    chunk_overlap = Column(Integer)
+    chunks_split = Column(Integer, nullable=False, default=0)
+    chunks_embedded = Column(Integer, nullable=False, default=0)
+    chunks_stored = Column(Integer, nullable=False, default=0)
+    summary = Column(JSON)
+    error = Column(Text)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime)
+    # Refreshed by the worker while the job runs; a running job whose
+    # heartbeat is older than the lease is taken to be orphaned.
+    heartbeat_at = Column(DateTime)
+    finished_at = Column(DateTime)
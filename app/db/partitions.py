@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import logging
+import re
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db.models import AuditLog
+from app.db.models import Document
+from app.db.vector_index import has_training_rows
+from app.db.vector_index import partition_index_name
+from app.db.vector_index import vector_index_ddl
+
+DEFAULT_COLLECTION = 'default'
+# Collection names end up in partition and index identifiers, so they are
+# kept to plain lowercase words short enough for the 63 byte limit.
+COLLECTION_NAME_PATTERN = r'^[a-z][a-z0-9_]{0,29}$'
+_UNPARTITIONED_TABLE = 'documents_unpartitioned'
+
+_AUDIT_PARTITION_PREFIX = 'audit_logs_p'
+# Catches rows outside every daily partition, e.g. when the maintenance job
+# has not run for longer than AUDIT_PARTITIONS_AHEAD_DAYS.
+_AUDIT_DEFAULT_PARTITION = 'audit_logs_default'
+_UNPARTITIONED_AUDIT_TABLE = 'audit_logs_unpartitioned'
+_AUDIT_MAINTENANCE_LOCK = 7411
+
+logger = logging.getLogger(__name__)
+
+
+def partition_name(collection: str) -> str:
+    if not re.fullmatch(COLLECTION_NAME_PATTERN, collection):
+        raise ValueError(f'Invalid collection name: {collection!r}')
+    return f'documents_{collection}'
+
+
+async def create_partition(
+    conn: AsyncConnection, collection: str, with_index: bool = True,
+) -> None:
+    partition = partition_name(collection)
+    await conn.execute(
+        text(
+            f'CREATE TABLE IF NOT EXISTS {partition} '
+            f"PARTITION OF documents FOR VALUES IN ('{collection}')",
+        ),
+    )
+    # A new partition is empty: HNSW is fine with that, while an IVFFlat
+    # index is left for build_deferred_index after the first load.
+    ddl = vector_index_ddl(partition_index_name(partition), partition)
+    if with_index and ddl is not None and settings.VECTOR_INDEX_TYPE == 'hnsw':
+        await conn.execute(text(ddl))
+
+
+async def build_deferred_index(engine: AsyncEngine, collection: str) -> None:
+    if settings.VECTOR_INDEX_TYPE != 'ivfflat':
+        return
+    partition = partition_name(collection)
+    index_name = partition_index_name(partition)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        exists = (
+            await conn.execute(
+                text('SELECT to_regclass(:name) IS NOT NULL'),
+                {'name': index_name},
+            )
+        ).scalar_one()
+        if exists or not await has_training_rows(conn, partition):
+            return
+        await conn.execute(
+            text(vector_index_ddl(index_name, partition, concurrently=True)),
+        )
+    logger.info('Built the IVFFlat index on %s', partition)
+
+
+async def truncate_partition(conn: AsyncConnection, collection: str) -> None:
+    # Empties the collection without touching rows one by one: no per-row
+    # WAL, no dead tuples left for vacuum.
+    await conn.execute(text(f'TRUNCATE {partition_name(collection)}'))
+
+
+async def detach_partition(engine: AsyncEngine, collection: str) -> None:
+    # A plain DETACH takes an ACCESS EXCLUSIVE lock on documents and stalls
+    # retrieval for every collection. The concurrent form cannot run in a
+    # transaction block, so it gets its own autocommit connection, like
+    # rebuild_vector_index. A detach interrupted half way is finalized.
+    partition = partition_name(collection)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        pending = (
+            await conn.execute(
+                text(
+                    'SELECT inhdetachpending FROM pg_inherits '
+                    'WHERE inhrelid = to_regclass(:partition) '
+                    "AND inhparent = to_regclass('documents')",
+                ),
+                {'partition': partition},
+            )
+        ).scalar_one_or_none()
+        if pending is None:
+            return
+        mode = 'FINALIZE' if pending else 'CONCURRENTLY'
+        await conn.execute(
+            text(f'ALTER TABLE documents DETACH PARTITION {partition} {mode}'),
+        )
+
+
+async def drop_partition(conn: AsyncConnection, collection: str) -> None:
+    # Expects the partition to have been detached with detach_partition.
+    await conn.execute(
+        text(f'DROP TABLE IF EXISTS {partition_name(collection)}'),
+    )
+
+
+async def _move_aside_unpartitioned(
+    conn: AsyncConnection, table: str, new_name: str,
+) -> bool:
+    # Databases created before a table was partitioned still have it as a
+    # plain table. It is renamed so the partitioned table can be created in
+    # its place; the caller copies the rows over and drops it.
+    relkind = (
+        await conn.execute(
+            text(
+                'SELECT relkind::text FROM pg_class '
+                'WHERE oid = to_regclass(:table)',
+            ),
+            {'table': table},
+        )
+    ).scalar_one_or_none()
+    if relkind != 'r':
+        return False
+
+    await conn.execute(text(f'ALTER TABLE {table} RENAME TO {new_name}'))
+    # The old constraint and index names would clash with the ones created
+    # for the partitioned table.
+    await conn.execute(
+        text(f'ALTER TABLE {new_name} DROP CONSTRAINT IF EXISTS {table}_pkey'),
+    )
+    indexes = await conn.execute(
+        text(
+            'SELECT indexrelid::regclass::text FROM pg_index '
+            'WHERE indrelid = CAST(:table AS regclass)',
+        ),
+        {'table': new_name},
+    )
+    for index in indexes.scalars().all():
+        await conn.execute(text(f'DROP INDEX {index}'))
+    return True
+
+
+async def ensure_partitioned_documents(conn: AsyncConnection) -> None:
+    legacy = await _move_aside_unpartitioned(
+        conn, 'documents', _UNPARTITIONED_TABLE,
+    )
+    if legacy:
+        await conn.run_sync(Document.__table__.create)
+
+    # The vector index is left to ensure_vector_index, so rows copied over
+    # from an old table are indexed in one build rather than row by row.
+    await create_partition(conn, DEFAULT_COLLECTION, with_index=False)
+    await conn.execute(
+        text(
+            'INSERT INTO collections (name, created_at) '
+            "VALUES (:name, now() AT TIME ZONE 'utc') "
+            'ON CONFLICT (name) DO NOTHING',
+        ),
+        {'name': DEFAULT_COLLECTION},
+    )
+
+    if legacy:
+        columns = ', '.join(
+            column.name for column in Document.__table__.columns
+            if column.name not in ('collection', 'content_tsv')
+        )
+        result = await conn.execute(
+            text(
+                f'INSERT INTO documents ({columns}, collection) '
+                f'SELECT {columns}, :collection FROM {_UNPARTITIONED_TABLE}',
+            ),
+            {'collection': DEFAULT_COLLECTION},
+        )
+        await conn.execute(text(f'DROP TABLE {_UNPARTITIONED_TABLE}'))
+        logger.info(
+            'Moved %d documents into the %r collection',
+            result.rowcount,
+            DEFAULT_COLLECTION,
+        )
+
+
+def audit_partition_name(day: date) -> str:
+    return f'{_AUDIT_PARTITION_PREFIX}{day:%Y%m%d}'
+
+
+async def list_audit_partitions(conn: AsyncConnection) -> dict[date, str]:
+    result = await conn.execute(
+        text(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            "WHERE i.inhparent = to_regclass('audit_logs')",
+        ),
+    )
+    return {
+        datetime.strptime(
+            name[len(_AUDIT_PARTITION_PREFIX):], '%Y%m%d',
+        ).date(): name
+        for name in result.scalars().all()
+        if name.startswith(_AUDIT_PARTITION_PREFIX)
+    }
+
+
+async def _create_audit_partition(conn: AsyncConnection, day: date) -> str:
+    partition = audit_partition_name(day)
+    bounds = {'start': day, 'end': day + timedelta(days=1)}
+    await conn.execute(
+        text(
+            f'CREATE TABLE {partition} '
+            f'(LIKE audit_logs INCLUDING DEFAULTS)',
+        ),
+    )
+    # Rows written before the day had its partition landed in the default
+    # partition; they move over first, as ATTACH refuses to run while the
+    # default still holds rows in the new range. The lock holds off writes
+    # to the default until the ATTACH, so none can slip in between.
+    await conn.execute(
+        text(
+            f'LOCK TABLE {_AUDIT_DEFAULT_PARTITION} '
+            f'IN SHARE ROW EXCLUSIVE MODE',
+        ),
+    )
+    await conn.execute(
+        text(
+            f'WITH moved AS ('
+            f'DELETE FROM {_AUDIT_DEFAULT_PARTITION} '
+            f'WHERE timestamp >= :start AND timestamp < :end '
+            f'RETURNING *) '
+            f'INSERT INTO {partition} SELECT * FROM moved',
+        ),
+        bounds,
+    )
+    await conn.execute(
+        text(
+            f'ALTER TABLE audit_logs ATTACH PARTITION {partition} '
+            f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')",
+        ),
+    )
+    return partition
+
+
+def _audit_cutoff() -> date | None:
+    retention = settings.AUDIT_RETENTION_DAYS
+    if retention <= 0:
+        return None
+    return datetime.utcnow().date() - timedelta(days=retention)
+
+
+async def maintain_audit_partitions(
+    conn: AsyncConnection, since: date | None = None,
+) -> tuple[list[str], list[str]]:
+    # Creates the daily partitions from ``since`` (today by default) up to
+    # AUDIT_PARTITIONS_AHEAD_DAYS ahead and drops the ones past retention.
+    # The advisory lock keeps several workers from racing on the same DDL.
+    await conn.execute(
+        text('SELECT pg_advisory_xact_lock(:key)'),
+        {'key': _AUDIT_MAINTENANCE_LOCK},
+    )
+    today = datetime.utcnow().date()
+    cutoff = _audit_cutoff()
+
+    day = since or today
+    if cutoff is not None:
+        day = max(day, cutoff)
+    existing = await list_audit_partitions(conn)
+    created = []
+    while day <= today + timedelta(days=settings.AUDIT_PARTITIONS_AHEAD_DAYS):
+        if day not in existing:
+            created.append(await _create_audit_partition(conn, day))
+        day += timedelta(days=1)
+
+    dropped = []
+    if cutoff is not None:
+        for day, partition in sorted(existing.items()):
+            if day >= cutoff:
+                break
+            await conn.execute(
+                text(f'ALTER TABLE audit_logs DETACH PARTITION {partition}'),
+            )
+            await conn.execute(text(f'DROP TABLE {partition}'))
+            dropped.append(partition)
+        await conn.execute(
+            text(
+                f'DELETE FROM {_AUDIT_DEFAULT_PARTITION} '
+                f'WHERE timestamp < :cutoff',
+            ),
+            {'cutoff': cutoff},
+        )
+    if created or dropped:
+        logger.info(
+            'Audit partitions maintained',
+            extra={
+                'created_partitions': created,
+                'dropped_partitions': dropped,
+            },
+        )
+    return created, dropped
+
+
+async def ensure_partitioned_audit_logs(conn: AsyncConnection) -> None:
+    legacy = await _move_aside_unpartitioned(
+        conn, 'audit_logs', _UNPARTITIONED_AUDIT_TABLE,
+    )
+    if legacy:
+        await conn.run_sync(AuditLog.__table__.create)
+    await conn.execute(
+        text(
+            f'CREATE TABLE IF NOT EXISTS {_AUDIT_DEFAULT_PARTITION} '
+            f'PARTITION OF audit_logs DEFAULT',
+        ),
+    )
+
+    since = None
+    if legacy:
+        oldest = (
+            await conn.execute(
+                text(
+                    f'SELECT min(timestamp) '
+                    f'FROM {_UNPARTITIONED_AUDIT_TABLE}',
+                ),
+            )
+        ).scalar_one()
+        since = oldest.date() if oldest is not None else None
+    await maintain_audit_partitions(conn, since)
+
+    if legacy:
+        columns = [column.name for column in AuditLog.__table__.columns]
+        values = [
+            "COALESCE(timestamp, now() AT TIME ZONE 'utc')"
+            if column == 'timestamp' else column
+            for column in columns
+        ]
+        # Rows already past retention have no daily partition and would
+        # sit in the default one until the next maintenance run, so they
+        # are dropped together with the legacy table.
+        cutoff = _audit_cutoff()
+        result = await conn.execute(
+            text(
+                f'INSERT INTO audit_logs ({", ".join(columns)}) '
+                f'SELECT {", ".join(values)} '
+                f'FROM {_UNPARTITIONED_AUDIT_TABLE} '
+                f'WHERE timestamp IS NULL OR timestamp >= :cutoff',
+            ),
+            {'cutoff': cutoff or date.min},
+        )
+        await conn.execute(text(f'DROP TABLE {_UNPARTITIONED_AUDIT_TABLE}'))
+        logger.info(
+            'Moved %d audit logs into daily partitions', result.rowcount,
+        )
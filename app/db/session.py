@@ -1,16 +1,44 @@
 from __future__ import annotations
 
+import logging
+
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 
 from app.core.config import settings
+from app.db.migrations import apply_schema_upgrades
 from app.db.models import Base
+from app.db.partitions import ensure_partitioned_audit_logs
+from app.db.partitions import ensure_partitioned_documents
+from app.db.pool import InstrumentedAsyncQueuePool
+from app.db.vector_index import ensure_vector_index
+
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.DATABASE_ECHO,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
 
-async_engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
+
+async_engine = _create_engine(settings.DATABASE_URL)
+
+# Read-only traffic (retrieval, listings) goes to the replica when one is
+# configured and falls back to the primary otherwise.
+read_engine = (
+    _create_engine(settings.DATABASE_REPLICA_URL)
+    if settings.DATABASE_REPLICA_URL else async_engine
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -19,6 +47,12 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 
 async def create_tables_on_startup():
     async with async_engine.begin() as conn:
@@ -27,12 +61,34 @@ async def create_tables_on_startup():
 
         await conn.run_sync(Base.metadata.create_all)
 
-    print(
-        'Database tables created and '
-        'pgvector extension enabled successfully.',
+        await apply_schema_upgrades(conn)
+
+        await ensure_partitioned_documents(conn)
+
+        await ensure_partitioned_audit_logs(conn)
+
+        await ensure_vector_index(conn)
+
+    logger.info(
+        'Database tables created and pgvector extension enabled successfully',
     )
 
 
 async def get_db_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db_session() -> AsyncSession:
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+def get_pool_stats() -> dict[str, dict | None]:
+    return {
+        'primary': async_engine.pool.stats(),
+        'replica': (
+            read_engine.pool.stats()
+            if read_engine is not async_engine else None
+        ),
+    }
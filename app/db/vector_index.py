@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+EMBEDDING_DIMENSIONS = 768
+
+logger = logging.getLogger(__name__)
+
+
+def _index_expression() -> tuple[str, str]:
+    # The column always keeps full-precision vectors; the compact storage
+    # modes only change what the ANN index is built over, so switching
+    # modes is an index rebuild rather than a rewrite of every row.
+    storage = settings.VECTOR_STORAGE
+    if storage == 'halfvec':
+        return (
+            f'(embedding::halfvec({EMBEDDING_DIMENSIONS}))',
+            'halfvec_cosine_ops',
+        )
+    if storage == 'bit':
+        return (
+            f'(binary_quantize(embedding)::bit({EMBEDDING_DIMENSIONS}))',
+            'bit_hamming_ops',
+        )
+    return 'embedding', 'vector_cosine_ops'
+
+
+def index_distance_sql(query: str) -> str:
+    # Must match the indexed expression exactly for the planner to use the
+    # index. ``query`` is a SQL expression holding the query vector text.
+    storage = settings.VECTOR_STORAGE
+    if storage == 'halfvec':
+        return (
+            f'embedding::halfvec({EMBEDDING_DIMENSIONS}) '
+            f'<=> CAST({query} AS halfvec({EMBEDDING_DIMENSIONS}))'
+        )
+    if storage == 'bit':
+        return (
+            f'binary_quantize(embedding)::bit({EMBEDDING_DIMENSIONS}) '
+            f'<~> binary_quantize(CAST({query} AS vector))'
+        )
+    return f'embedding <=> CAST({query} AS vector)'
+
+
+def partition_index_name(partition: str) -> str:
+    return f'{partition}_embedding_idx'
+
+
+def vector_index_ddl(
+    index_name: str, table: str, concurrently: bool = False,
+) -> str | None:
+    index_type = settings.VECTOR_INDEX_TYPE
+
+    if index_type == 'hnsw':
+        options = (
+            f'm = {int(settings.HNSW_M)}, '
+            f'ef_construction = {int(settings.HNSW_EF_CONSTRUCTION)}'
+        )
+    elif index_type == 'ivfflat':
+        options = f'lists = {int(settings.IVFFLAT_LISTS)}'
+    else:
+        return None
+
+    expression, opclass = _index_expression()
+    return (
+        f'CREATE INDEX {"CONCURRENTLY " if concurrently else ""}'
+        f'IF NOT EXISTS {index_name} ON {table} '
+        f'USING {index_type} ({expression} {opclass}) '
+        f'WITH ({options})'
+    )
+
+
+async def has_training_rows(conn: AsyncConnection, table: str) -> bool:
+    # IVFFlat learns its list centroids from the rows present when the
+    # index is built. Trained on an empty or nearly empty partition the
+    # lists are meaningless and recall stays poor until a rebuild, so the
+    # index waits until there are at least as many rows as lists.
+    if settings.VECTOR_INDEX_TYPE != 'ivfflat':
+        return True
+    lists = int(settings.IVFFLAT_LISTS)
+    rows = (
+        await conn.execute(
+            text(
+                f'SELECT count(*) FROM '
+                f'(SELECT 1 FROM {table} LIMIT {lists}) AS sample',
+            ),
+        )
+    ).scalar_one()
+    return rows >= lists
+
+
+async def list_document_partitions(conn: AsyncConnection) -> list[str]:
+    result = await conn.execute(
+        text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass('documents')
+            ORDER BY c.relname
+            """,
+        ),
+    )
+    return list(result.scalars().all())
+
+
+async def ensure_vector_index(conn: AsyncConnection) -> None:
+    # Each collection partition carries its own ANN index; queries are
+    # pruned to one partition, so there is no index on the parent table.
+    for partition in await list_document_partitions(conn):
+        index_name = partition_index_name(partition)
+        ddl = vector_index_ddl(index_name, partition)
+        if ddl is None:
+            return
+        if not await has_training_rows(conn, partition):
+            logger.info(
+                'Deferring the IVFFlat index on %s until it has data',
+                partition,
+            )
+            continue
+        await conn.execute(text(ddl))
+
+        # IF NOT EXISTS keeps an index built for another storage mode,
+        # which queries would then bypass; existing rows are migrated by
+        # rebuilding.
+        definition = (
+            await conn.execute(
+                text(
+                    'SELECT indexdef FROM pg_indexes WHERE indexname = :name',
+                ),
+                {'name': index_name},
+            )
+        ).scalar_one()
+        if _index_expression()[1] not in definition:
+            logger.warning(
+                'Vector index %s does not match VECTOR_STORAGE=%s; call '
+                'POST /admin/vector-index/rebuild to migrate it',
+                index_name,
+                settings.VECTOR_STORAGE,
+            )
+
+
+async def rebuild_vector_index(engine: AsyncEngine) -> None:
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block,
+    # so the rebuild is driven from an autocommit connection. Partitions
+    # are rebuilt one at a time: the new index is built next to the old one
+    # and swapped in, keeping retrieval index-backed for the whole rebuild.
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+
+        for partition in await list_document_partitions(conn):
+            index_name = partition_index_name(partition)
+            rebuild_name = f'{index_name}_new'
+            retired_name = f'{index_name}_old'
+            ddl = vector_index_ddl(rebuild_name, partition, concurrently=True)
+            if not await has_training_rows(conn, partition):
+                ddl = None
+
+            # Leftovers of an interrupted rebuild.
+            for name in (rebuild_name, retired_name):
+                await conn.execute(
+                    text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'),
+                )
+            if ddl is not None:
+                await conn.execute(text(ddl))
+            # The old index is only renamed aside, and dropped once the new
+            # one has its name, so a query always finds one of them.
+            await conn.execute(
+                text(
+                    f'ALTER INDEX IF EXISTS {index_name} '
+                    f'RENAME TO {retired_name}',
+                ),
+            )
+            if ddl is not None:
+                await conn.execute(
+                    text(f'ALTER INDEX {rebuild_name} RENAME TO {index_name}'),
+                )
+            await conn.execute(
+                text(f'DROP INDEX CONCURRENTLY IF EXISTS {retired_name}'),
+            )
+
+    logger.info(
+        'Vector index rebuilt (%s, %s)',
+        settings.VECTOR_INDEX_TYPE,
+        settings.VECTOR_STORAGE,
+    )
+
+
+async def describe_vector_index(db: AsyncSession) -> dict | None:
+    result = await db.execute(
+        text(
+            """
+            SELECT min(i.indexdef) AS definition,
+                   bool_and(x.indisvalid) AS is_valid,
+                   sum(pg_relation_size(x.indexrelid))::bigint AS size_bytes,
+                   count(*) AS partitions
+            FROM pg_inherits h
+            JOIN pg_class p ON p.oid = h.inhrelid
+            JOIN pg_indexes i
+              ON i.tablename = p.relname
+             AND i.indexname = p.relname || '_embedding_idx'
+            JOIN pg_class c ON c.relname = i.indexname
+            JOIN pg_index x ON x.indexrelid = c.oid
+            WHERE h.inhparent = to_regclass('documents')
+            """,
+        ),
+    )
+    row = result.mappings().first()
+    return dict(row) if row and row['partitions'] else None
+
+
+async def apply_search_params(
+    db: AsyncSession,
+    ef_search: int | None = None,
+    probes: int | None = None,
+    filtered: bool = False,
+) -> None:
+    # SET LOCAL only lasts for the current transaction, so per-request
+    # overrides never leak into other requests sharing a pooled connection.
+    index_type = settings.VECTOR_INDEX_TYPE
+    if index_type == 'hnsw':
+        value = int(ef_search or settings.HNSW_EF_SEARCH)
+        if settings.VECTOR_STORAGE != 'vector':
+            # HNSW returns at most ef_search rows, and the compact index has
+            # to supply the whole re-ranking pool.
+            value = max(value, settings.VECTOR_RERANK_CANDIDATES)
+        await db.execute(text(f'SET LOCAL hnsw.ef_search = {value}'))
+    elif index_type == 'ivfflat':
+        value = int(probes or settings.IVFFLAT_PROBES)
+        await db.execute(text(f'SET LOCAL ivfflat.probes = {value}'))
+    else:
+        return
+
+    # Without iterative scans a filtered query only sees the ef_search /
+    # probes candidates the index hands back, and can return fewer than
+    # top_k rows when the filter is selective (requires pgvector >= 0.8).
+    if filtered and settings.VECTOR_FILTER_STRATEGY == 'iterative':
+        await db.execute(
+            text(f'SET LOCAL {index_type}.iterative_scan = relaxed_order'),
+        )
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+from .builder import build_graph
 from .builder import get_graph_runnable
+from .nodes import build_context_node
+from .nodes import check_cache_node
+from .nodes import diversify_node
 from .nodes import generate_node
 from .nodes import retrieve_node
+from .nodes import store_cache_node
 from .state import GraphState
 
 __all__ = [
+    'build_graph',
     'get_graph_runnable',
+    'check_cache_node',
     'retrieve_node',
+    'diversify_node',
+    'build_context_node',
     'generate_node',
+    'store_cache_node',
     'GraphState',
 ]
@@ -1,26 +1,47 @@
 from __future__ import annotations
 
-from functools import partial
+from functools import lru_cache
 
 from langgraph.graph import END
 from langgraph.graph import StateGraph
-from sqlalchemy.ext.asyncio import AsyncSession
 
+from .nodes import build_context_node
+from .nodes import check_cache_node
+from .nodes import diversify_node
 from .nodes import generate_node
 from .nodes import retrieve_node
+from .nodes import route_after_cache
+from .nodes import store_cache_node
 from .state import GraphState
 
 
-def get_graph_runnable(db: AsyncSession):
+def build_graph():
     workflow = StateGraph(GraphState)
 
-    retrieve_with_db = partial(retrieve_node, db=db)
-
-    workflow.add_node('retrieve', retrieve_with_db)
+    workflow.add_node('check_cache', check_cache_node)
+    workflow.add_node('retrieve', retrieve_node)
+    workflow.add_node('diversify', diversify_node)
+    workflow.add_node('build_context', build_context_node)
     workflow.add_node('generate', generate_node)
-
-    workflow.set_entry_point('retrieve')
-    workflow.add_edge('retrieve', 'generate')
-    workflow.add_edge('generate', END)
+    workflow.add_node('store_cache', store_cache_node)
+
+    workflow.set_entry_point('check_cache')
+    workflow.add_conditional_edges(
+        'check_cache',
+        route_after_cache,
+        {'hit': END, 'miss': 'retrieve'},
+    )
+    workflow.add_edge('retrieve', 'diversify')
+    workflow.add_edge('diversify', 'build_context')
+    workflow.add_edge('build_context', 'generate')
+    workflow.add_edge('generate', 'store_cache')
+    workflow.add_edge('store_cache', END)
 
     return workflow.compile()
+
+
+@lru_cache(maxsize=1)
+def get_graph_runnable():
+    # Compiled once per process; callers pass the request's database
+    # session as ``config={'configurable': {'db': session}}``.
+    return build_graph()
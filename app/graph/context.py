@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.core.tokens import estimate_tokens
+
+CONTEXT_SEPARATOR = '\n\n---\n\n'
+# Shorter matches between neighbouring chunks are more likely a coincidence
+# (a repeated word) than the splitter's overlap, and are left alone.
+_MIN_OVERLAP_CHARS = 16
+
+
+def merge_overlap(left: str, right: str) -> str:
+    for size in range(min(len(left), len(right)), _MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f'{left}\n{right}'
+
+
+def _is_next_chunk(previous: dict[str, Any], doc: dict[str, Any]) -> bool:
+    return (
+        doc.get('source_id') is not None
+        and doc.get('source_id') == previous.get('source_id')
+        and previous.get('chunk_index') is not None
+        and doc.get('chunk_index') == previous['chunk_index'] + 1
+    )
+
+
+def assemble_context(docs: list[dict[str, Any]]) -> str:
+    # Consecutive chunks of the same source are stitched back into one
+    # passage with their shared overlap written once. Passages keep the
+    # order of their best ranked chunk.
+    rank = {id(doc): i for i, doc in enumerate(docs)}
+    runs: list[list[dict[str, Any]]] = []
+    for doc in sorted(
+        docs,
+        key=lambda d: (
+            d.get('source_id') is None,
+            d.get('source_id') or '',
+            d.get('chunk_index') or 0,
+        ),
+    ):
+        if runs and _is_next_chunk(runs[-1][-1], doc):
+            runs[-1].append(doc)
+        else:
+            runs.append([doc])
+    runs.sort(key=lambda run: min(rank[id(doc)] for doc in run))
+
+    passages = []
+    for run in runs:
+        passage = run[0]['content']
+        for doc in run[1:]:
+            passage = merge_overlap(passage, doc['content'])
+        passages.append(passage)
+    return CONTEXT_SEPARATOR.join(passages)
+
+
+def fill_context_budget(
+    ranked_docs: list[dict[str, Any]], token_budget: int,
+) -> tuple[list[dict[str, Any]], str]:
+    # Chunks are taken in ranked order while the assembled context fits the
+    # budget, so the number of chunks adapts to their length and to how
+    # much of them merges with neighbours already picked. The best chunk is
+    # always kept.
+    selected: list[dict[str, Any]] = []
+    context = ''
+    for doc in ranked_docs:
+        candidate = assemble_context([*selected, doc])
+        if selected and estimate_tokens(candidate) > token_budget:
+            continue
+        selected.append(doc)
+        context = candidate
+    return selected, context
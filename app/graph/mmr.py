@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def mmr_select(
+    query_embedding: list[float],
+    candidate_embeddings: list[list[float]],
+    k: int,
+    lambda_mult: float,
+    relevance_scores: list[float] | None = None,
+) -> list[int]:
+    # Greedy maximal marginal relevance. Each step picks the candidate
+    # maximising lambda * rel(c) - (1 - lambda) * max sim(c, picked);
+    # the closest similarity to the picked set is kept as a running maximum,
+    # so a step costs one column of the pairwise matrix instead of a loop
+    # over everything picked so far. rel(c) is the cosine similarity to the
+    # query unless relevance_scores (e.g. fused hybrid scores) are given;
+    # those are scaled so the best candidate scores 1.
+    if not candidate_embeddings or k <= 0:
+        return []
+
+    candidates = _normalize(np.asarray(candidate_embeddings, dtype=np.float32))
+    if relevance_scores is None:
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        relevance = candidates @ query
+    else:
+        relevance = np.asarray(relevance_scores, dtype=np.float32)
+        top = relevance.max()
+        if top > 0:
+            relevance = relevance / top
+    pairwise = candidates @ candidates.T
+
+    k = min(k, len(candidates))
+    selected = [int(np.argmax(relevance))]
+    closest = pairwise[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * closest
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(closest, pairwise[best], out=closest)
+
+    return selected
@@ -1,58 +1,248 @@
 from __future__ import annotations
 
+import logging
+import time
 from typing import Any
 
 from langchain_core.messages import AIMessage
 from langchain_core.messages import HumanMessage
 from langchain_core.messages import SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from sqlalchemy import text
+from langchain_core.runnables import RunnableConfig
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .context import fill_context_budget
+from .mmr import mmr_select
+from .retrieval import hybrid_search
+from .retrieval import vector_search
 from .state import GraphState
+from app.cache import CachedEmbeddings
+from app.cache import embedding_cache
+from app.cache import semantic_cache
 from app.core import settings
+from app.db import apply_search_params
+from app.providers import create_chat_model
+from app.providers import create_query_embedding_model
+from app.providers import embedding_model_name
 
-embedding_model = GoogleGenerativeAIEmbeddings(
-    model=settings.EMBEDDING_MODEL, google_api_key=settings.GEMINI_API_KEY,
+embedding_model = CachedEmbeddings(
+    create_query_embedding_model(),
+    model=embedding_model_name(),
+    cache=embedding_cache,
 )
 
-llm = ChatGoogleGenerativeAI(
-    model=settings.LLM_MODEL,
-    google_api_key=settings.GEMINI_API_KEY,
-    convert_system_message_to_human=True,
-)
+llm = create_chat_model()
 
+logger = logging.getLogger(__name__)
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def _get_db(config: RunnableConfig, read_only: bool = False) -> AsyncSession:
+    # The graph is compiled once and shared, so the request's sessions
+    # travel in the run config rather than being bound into the nodes.
+    configurable = config['configurable']
+    if read_only and configurable.get('read_db') is not None:
+        return configurable['read_db']
+    return configurable['db']
+
+
+def _semantic_cache_eligible(state: GraphState) -> bool:
+    # Answers to follow-up questions depend on the conversation, so only
+    # standalone questions are served from or written to the cache. Cached
+    # answers are not scoped, so filtered questions skip it as well.
+    return (
+        semantic_cache.enabled
+        and not state.get('bypass_cache')
+        and not state.get('chat_history')
+        and not state.get('conversation_summary')
+        and not state.get('filters')
+    )
 
-async def retrieve_node(state: GraphState, db: AsyncSession) -> dict[str, Any]:
-    print('---NODE: RETRIEVE---')
-    question = state['question']
 
-    question_embedding = await embedding_model.aembed_query(question)
+async def check_cache_node(
+    state: GraphState, config: RunnableConfig,
+) -> dict[str, Any]:
+    logger.debug('Running node check_cache')
+    # Read from the primary: invalidations are written there, and a lagging
+    # replica would keep serving answers for content that has changed.
+    db = _get_db(config)
+    start = time.perf_counter()
+    question_embedding = await embedding_model.aembed_query(state['question'])
+    timings = {'embed_query': _elapsed_ms(start)}
 
-    stmt = text(
-        """
-        SELECT content, doc_metadata, 1 -
-        (embedding <=> :query_embedding) AS similarity
-        FROM documents
-        ORDER BY similarity DESC
-        LIMIT 3
-        """,
+    if not _semantic_cache_eligible(state):
+        semantic_cache.record_bypass()
+        return {
+            'question_embedding': question_embedding,
+            'cache_hit': False,
+            'timings': timings,
+        }
+
+    start = time.perf_counter()
+    cached = await semantic_cache.lookup(
+        db, question_embedding, collection=state['collection'],
     )
-    result = await db.execute(
-        stmt,
-        {'query_embedding': str(question_embedding)},
+    await db.rollback()
+    timings['cache_lookup'] = _elapsed_ms(start)
+    if cached is None:
+        return {
+            'question_embedding': question_embedding,
+            'cache_hit': False,
+            'timings': timings,
+        }
+
+    logger.info(
+        'Semantic cache hit', extra={'similarity': cached['similarity']},
     )
-    retrieved_docs = [dict(row) for row in result.mappings().all()]
+    return {
+        'question_embedding': question_embedding,
+        'cache_hit': True,
+        'response': cached['response'],
+        'retrieved_docs': cached['retrieved_docs'] or [],
+        'timings': timings,
+    }
+
 
-    context = '\n\n---\n\n'.join([doc['content'] for doc in retrieved_docs])
+def route_after_cache(state: GraphState) -> str:
+    return 'hit' if state.get('cache_hit') else 'miss'
 
-    print(f'Retrieved {len(retrieved_docs)} documents.')
-    return {'retrieved_docs': retrieved_docs, 'context': context}
+
+async def retrieve_node(
+    state: GraphState, config: RunnableConfig,
+) -> dict[str, Any]:
+    logger.debug('Running node retrieve')
+    # An answer that may be cached is retrieved on the primary. The stored
+    # generation vouches for the chunks it was built from, and a lagging
+    # replica could return chunks older than that generation.
+    cacheable = _semantic_cache_eligible(state)
+    db = _get_db(config, read_only=not cacheable)
+    question = state['question']
+    filters = state.get('filters')
+    timings = {}
+
+    question_embedding = state.get('question_embedding')
+    if question_embedding is None:
+        start = time.perf_counter()
+        question_embedding = await embedding_model.aembed_query(question)
+        timings['embed_query'] = _elapsed_ms(start)
+
+    # Read before searching, so a change committed in between shows up as
+    # a newer generation when the answer is stored.
+    cache_generation = None
+    if cacheable:
+        cache_generation = await semantic_cache.generation(
+            db, state['collection'],
+        )
+
+    start = time.perf_counter()
+    await apply_search_params(
+        db,
+        ef_search=state.get('ef_search'),
+        probes=state.get('probes'),
+        filtered=bool(filters),
+    )
+
+    # With MMR the search over-fetches, and the diversify node picks the
+    # final RETRIEVAL_TOP_K from the candidates.
+    fetch_k = settings.RETRIEVAL_TOP_K
+    if settings.MMR_ENABLED:
+        fetch_k = max(settings.MMR_FETCH_K, fetch_k)
+
+    if (state.get('retrieval_mode') or settings.RETRIEVAL_MODE) == 'hybrid':
+        candidates = await hybrid_search(
+            db,
+            question,
+            question_embedding,
+            fetch_k,
+            filters=filters,
+            with_embeddings=settings.MMR_ENABLED,
+            collection=state['collection'],
+        )
+    else:
+        candidates = await vector_search(
+            db,
+            question_embedding,
+            fetch_k,
+            filters=filters,
+            with_embeddings=settings.MMR_ENABLED,
+            collection=state['collection'],
+        )
+    # End the read-only transaction so the pooled connection is returned
+    # before the (much slower) generation step instead of being held for the
+    # whole streamed response.
+    await db.rollback()
+    timings['retrieval'] = _elapsed_ms(start)
+
+    logger.debug('Retrieved %d candidates', len(candidates))
+    return {
+        'question_embedding': question_embedding,
+        'candidates': candidates,
+        'cache_generation': cache_generation,
+        'timings': timings,
+    }
+
+
+async def diversify_node(state: GraphState) -> dict[str, Any]:
+    logger.debug('Running node diversify')
+    # The similarity floor only applies to vector search. A hybrid
+    # candidate may be there for its exact term matches alone, and its
+    # fused rank already says how relevant it is.
+    candidates = [
+        doc for doc in state.get('candidates') or []
+        if 'rrf_score' in doc
+        or doc['similarity'] >= settings.CONTEXT_MIN_SIMILARITY
+    ]
+    top_k = settings.RETRIEVAL_TOP_K
+
+    start = time.perf_counter()
+    if settings.MMR_ENABLED and len(candidates) > top_k:
+        # Hybrid candidates keep their fused rank as relevance, so exact
+        # term matches are not re-ranked away on cosine similarity alone;
+        # cosine is only used to measure redundancy between chunks.
+        hybrid = all('rrf_score' in doc for doc in candidates)
+        picked = mmr_select(
+            state['question_embedding'],
+            [doc['embedding'] for doc in candidates],
+            top_k,
+            settings.MMR_LAMBDA,
+            relevance_scores=(
+                [doc['rrf_score'] for doc in candidates] if hybrid else None
+            ),
+        )
+        candidates = [candidates[i] for i in picked]
+    else:
+        candidates = candidates[:top_k]
+    timings = {'mmr': _elapsed_ms(start)}
+
+    # Embeddings are only needed for the selection; the documents are
+    # stored in the audit log and the semantic cache without them.
+    return {
+        'candidates': [
+            {key: value for key, value in doc.items() if key != 'embedding'}
+            for doc in candidates
+        ],
+        'timings': timings,
+    }
+
+
+async def build_context_node(state: GraphState) -> dict[str, Any]:
+    logger.debug('Running node build_context')
+    start = time.perf_counter()
+    retrieved_docs, context = fill_context_budget(
+        state.get('candidates') or [], settings.CONTEXT_TOKEN_BUDGET,
+    )
+    logger.debug('Built context from %d chunks', len(retrieved_docs))
+    return {
+        'retrieved_docs': retrieved_docs,
+        'context': context,
+        'timings': {'build_context': _elapsed_ms(start)},
+    }
 
 
 async def generate_node(state: GraphState) -> dict[str, Any]:
-    print('---NODE: GENERATE (MULTI-TURN)---')
+    logger.debug('Running node generate')
     question = state['question']
     context = state['context']
     chat_history = state.get('chat_history', [])
@@ -82,16 +272,52 @@ Question:
         context=context, question=question,
     )
 
+    system_prompt = (
+        'You are a helpful AI assistant, chatting and '
+        'answering questions based on the information provided. '
+        'Your output must be in English.'
+    )
+    # Older turns of a server-side session arrive folded into a summary;
+    # it shares the single system message since Gemini only accepts one.
+    summary = state.get('conversation_summary')
+    if summary:
+        system_prompt += f'\n\nSummary of the earlier conversation:\n{summary}'
+
     messages_to_llm = [
-        SystemMessage(
-            content='You are a helpful AI assistant, chatting and '
-            'answering questions based on the information provided. '
-            'Your output must be in English.',
-        ),
+        SystemMessage(content=system_prompt),
         *history_messages,
         HumanMessage(content=final_prompt_text),
     ]
 
-    response = await llm.ainvoke(messages_to_llm)
+    # Streaming from the model lets LangGraph's "messages" stream mode
+    # surface each token to the caller as soon as it is generated.
+    response = ''
+    timings = {}
+    start = time.perf_counter()
+    async for chunk in llm.astream(messages_to_llm):
+        if 'llm_ttft' not in timings:
+            timings['llm_ttft'] = _elapsed_ms(start)
+        response += chunk.content
+    timings['llm_total'] = _elapsed_ms(start)
 
-    return {'response': response.content}
+    return {'response': response, 'timings': timings}
+
+
+async def store_cache_node(
+    state: GraphState, config: RunnableConfig,
+) -> dict[str, Any]:
+    logger.debug('Running node store_cache')
+    if not _semantic_cache_eligible(state) or not state.get('response'):
+        return {}
+
+    start = time.perf_counter()
+    await semantic_cache.store(
+        _get_db(config),
+        question=state['question'],
+        question_embedding=state['question_embedding'],
+        response=state['response'],
+        retrieved_docs=state.get('retrieved_docs', []),
+        collection=state['collection'],
+        generation=state.get('cache_generation'),
+    )
+    return {'timings': {'cache_store': _elapsed_ms(start)}}
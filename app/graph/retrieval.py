@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import settings
+from app.db import DEFAULT_COLLECTION
+from app.db.vector_index import index_distance_sql
+
+# Every query is scoped to one collection, so the planner prunes it to that
+# collection's partition and its vector index.
+_COLLECTION_FILTER = 'collection = :collection'
+_METADATA_FILTER = 'doc_metadata @> CAST(:filters AS jsonb)'
+# Candidates headed for MMR carry their embeddings, cast to a plain float
+# array so they arrive as Python lists.
+_EMBEDDING_COLUMN = ', CAST(d.embedding AS real[]) AS embedding'
+
+
+def _nearest_sql(filtered: bool) -> str:
+    # Ordering by the bare distance operator (rather than the derived
+    # similarity) is what lets the planner use the ANN index.
+    source = 'documents'
+    where = f'WHERE {_COLLECTION_FILTER}'
+    if filtered:
+        if settings.VECTOR_FILTER_STRATEGY == 'prefilter':
+            # The filtered rows are collected through the GIN index first
+            # and ranked exactly; OFFSET 0 keeps the planner from pushing
+            # the ORDER BY down onto the ANN index.
+            source = (
+                f'(SELECT id, embedding FROM documents '
+                f'WHERE {_COLLECTION_FILTER} AND {_METADATA_FILTER} '
+                f'OFFSET 0) AS filtered'
+            )
+            where = ''
+        else:
+            # With iterative index scans enabled (see apply_search_params)
+            # the ANN index keeps producing candidates until enough rows
+            # pass the predicate.
+            where += f' AND {_METADATA_FILTER}'
+
+    if settings.VECTOR_STORAGE == 'vector':
+        return f"""
+            SELECT id,
+                   embedding <=> CAST(:query_embedding AS vector) AS distance
+            FROM {source}
+            {where}
+            ORDER BY embedding <=> CAST(:query_embedding AS vector)
+            LIMIT :candidates
+        """
+
+    # The compact index only approximates the ranking, so a larger pool is
+    # taken from it and re-ranked by the exact full-precision distance.
+    return f"""
+        SELECT id,
+               embedding <=> CAST(:query_embedding AS vector) AS distance
+        FROM (
+            SELECT id, embedding
+            FROM {source}
+            {where}
+            ORDER BY {index_distance_sql(':query_embedding')}
+            LIMIT GREATEST(:rerank_candidates, :candidates)
+        ) AS approximate
+        ORDER BY distance
+        LIMIT :candidates
+    """
+
+
+def _vector_search_sql(filtered: bool, with_embeddings: bool) -> str:
+    # Iterative scans return rows in relaxed order, so the candidates are
+    # materialized and sorted again by their exact distance.
+    return f"""
+        WITH nearest AS MATERIALIZED ({_nearest_sql(filtered)})
+        SELECT d.content, d.doc_metadata, d.source_id, d.chunk_index,
+               1 - n.distance AS similarity
+               {_EMBEDDING_COLUMN if with_embeddings else ''}
+        FROM nearest n
+        JOIN documents d ON d.id = n.id AND d.{_COLLECTION_FILTER}
+        ORDER BY n.distance
+    """
+
+
+# Both candidate lists are produced in one round trip and merged with
+# reciprocal rank fusion: score = sum(1 / (rrf_k + rank)) over the lists a
+# chunk appears in. The lexical side ranks with ts_rank_cd over the GIN
+# indexed content_tsv column.
+def _hybrid_search_sql(filtered: bool, with_embeddings: bool) -> str:
+    lexical_filter = f'AND {_METADATA_FILTER}' if filtered else ''
+    return f"""
+        WITH vector_hits AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM ({_nearest_sql(filtered)}) AS nearest
+        ),
+        lexical_hits AS (
+            SELECT id,
+                   row_number() OVER (
+                       ORDER BY ts_rank_cd(content_tsv, query) DESC
+                   ) AS rank
+            FROM documents,
+                 websearch_to_tsquery('english', :question) AS query
+            WHERE content_tsv @@ query
+              AND {_COLLECTION_FILTER}
+            {lexical_filter}
+            ORDER BY ts_rank_cd(content_tsv, query) DESC
+            LIMIT :candidates
+        ),
+        fused AS (
+            SELECT id,
+                   CAST(SUM(1.0 / (:rrf_k + rank)) AS float8) AS rrf_score
+            FROM (
+                SELECT id, rank FROM vector_hits
+                UNION ALL
+                SELECT id, rank FROM lexical_hits
+            ) AS hits
+            GROUP BY id
+        )
+        SELECT d.content, d.doc_metadata, d.source_id, d.chunk_index,
+               1 - (d.embedding <=> CAST(:query_embedding AS vector))
+               AS similarity,
+               f.rrf_score
+               {_EMBEDDING_COLUMN if with_embeddings else ''}
+        FROM fused f
+        JOIN documents d ON d.id = f.id AND d.{_COLLECTION_FILTER}
+        ORDER BY f.rrf_score DESC
+        LIMIT :top_k
+    """
+
+
+def _params(
+    question_embedding: list[float],
+    filters: dict[str, Any] | None,
+    collection: str,
+) -> dict[str, Any]:
+    params = {
+        'query_embedding': str(question_embedding),
+        'collection': collection,
+        'rerank_candidates': settings.VECTOR_RERANK_CANDIDATES,
+    }
+    if filters:
+        params['filters'] = json.dumps(filters)
+    return params
+
+
+async def vector_search(
+    db: AsyncSession,
+    question_embedding: list[float],
+    top_k: int,
+    filters: dict[str, Any] | None = None,
+    with_embeddings: bool = False,
+    collection: str = DEFAULT_COLLECTION,
+) -> list[dict[str, Any]]:
+    result = await db.execute(
+        text(_vector_search_sql(bool(filters), with_embeddings)),
+        {
+            **_params(question_embedding, filters, collection),
+            'candidates': top_k,
+        },
+    )
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def hybrid_search(
+    db: AsyncSession,
+    question: str,
+    question_embedding: list[float],
+    top_k: int,
+    filters: dict[str, Any] | None = None,
+    with_embeddings: bool = False,
+    collection: str = DEFAULT_COLLECTION,
+) -> list[dict[str, Any]]:
+    result = await db.execute(
+        text(_hybrid_search_sql(bool(filters), with_embeddings)),
+        {
+            **_params(question_embedding, filters, collection),
+            'question': question,
+            'top_k': top_k,
+            'candidates': max(settings.HYBRID_CANDIDATES, top_k),
+            'rrf_k': settings.RRF_K,
+        },
+    )
+    return [dict(row) for row in result.mappings().all()]
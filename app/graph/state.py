@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import operator
+from typing import Annotated
 from typing import Any
 from typing import TypedDict
 
@@ -9,4 +11,21 @@ class GraphState(TypedDict):
     context: str
     response: str
     retrieved_docs: list[dict[str, Any]]
+    # Retrieval candidates, ranked by the diversify node and then trimmed to
+    # the context budget into retrieved_docs.
+    candidates: list[dict[str, Any]]
     chat_history: list[dict[str, str]]
+    conversation_summary: str | None
+    question_embedding: list[float]
+    bypass_cache: bool
+    cache_hit: bool
+    # Knowledge base generation seen before retrieval; the answer is only
+    # cached if it is still current when generation finishes.
+    cache_generation: int | None
+    ef_search: int | None
+    probes: int | None
+    retrieval_mode: str | None
+    filters: dict[str, Any] | None
+    collection: str
+    # Stage durations in milliseconds; each node adds its own entries.
+    timings: Annotated[dict[str, float], operator.or_]
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import logging
+
 import gradio as gr
 from fastapi import FastAPI
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest
 
 from app.api import endpoints
+from app.cache import embedding_cache
+from app.core.chunking import chunking_pool
+from app.core.logging_config import configure_logging
 from app.db.session import create_tables_on_startup
+from app.services import audit_log_writer
+from app.services import audit_retention_job
+from app.services import ingestion_job_manager
+from app.services import session_service
 from app.ui.gradio_ui import create_ui
 
+configure_logging()
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title='Knowledge Base AI System',
     description='An interview project using FastAPI, '
@@ -17,9 +32,23 @@ app = FastAPI(
 
 @app.on_event('startup')
 async def on_startup():
-    print('Application is starting up...')
+    logger.info('Application is starting up')
     await create_tables_on_startup()
-    print('Application startup is complete.')
+    await embedding_cache.purge_expired()
+    audit_log_writer.start()
+    audit_retention_job.start()
+    await ingestion_job_manager.start()
+    logger.info('Application startup is complete')
+
+
+@app.on_event('shutdown')
+async def on_shutdown():
+    await ingestion_job_manager.stop()
+    await audit_retention_job.stop()
+    chunking_pool.shutdown()
+    await session_service.wait_for_compactions()
+    await audit_log_writer.stop()
+    logger.info('Audit log writer drained')
 
 
 app.include_router(endpoints.router)
@@ -30,6 +59,11 @@ def health_check():
     return {'status': 'ok'}
 
 
+@app.get('/metrics', tags=['Health Check'])
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 gradio_app = create_ui()
 
 app = gr.mount_gradio_app(app, gradio_app, path='/ui')
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from .batching import BatchedQueryEmbeddings
+from .factory import create_chat_model
+from .factory import create_embedding_model
+from .factory import create_query_embedding_model
+from .factory import embedding_model_name
+from .fake import FakeStreamingChatModel
+from .fake import HashEmbeddings
+
+__all__ = [
+    'BatchedQueryEmbeddings',
+    'create_chat_model',
+    'create_embedding_model',
+    'create_query_embedding_model',
+    'embedding_model_name',
+    'FakeStreamingChatModel',
+    'HashEmbeddings',
+]
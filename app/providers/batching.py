@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.metrics import EMBEDDING_QUERY_BATCH_SIZE
+from app.core.metrics import EMBEDDING_QUERY_QUEUE_SECONDS
+
+
+class BatchedQueryEmbeddings(Embeddings):
+    # Query embeddings requested within window_ms of each other are sent
+    # as a single aembed_documents call, so concurrent chats share one
+    # provider round-trip instead of making one each. A full batch is sent
+    # at once without waiting for the window to close.
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        window_ms: float,
+        max_batch_size: int,
+        query_options: dict[str, Any] | None = None,
+    ):
+        self.embeddings = embeddings
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.query_options = query_options or {}
+        self._pending: list[tuple[str, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._embed(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _embed(
+        self, batch: list[tuple[str, asyncio.Future, float]],
+    ) -> None:
+        sent = time.perf_counter()
+        for _, _, queued in batch:
+            EMBEDDING_QUERY_QUEUE_SECONDS.observe(sent - queued)
+        EMBEDDING_QUERY_BATCH_SIZE.observe(len(batch))
+
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            vectors = await self.embeddings.aembed_documents(
+                texts, **self.query_options,
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        embeddings = dict(zip(texts, vectors))
+        for text, future, _ in batch:
+            # Callers that were cancelled while waiting are skipped.
+            if not future.done():
+                future.set_result(embeddings[text])
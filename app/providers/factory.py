@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from .batching import BatchedQueryEmbeddings
+from .fake import FakeStreamingChatModel
+from .fake import HashEmbeddings
+from app.core.config import settings
+
+
+def embedding_model_name() -> str:
+    # Used as the embedding cache namespace so vectors from the fake
+    # provider never mix with real ones in the persistent tier.
+    if settings.EMBEDDING_PROVIDER == 'fake':
+        return f'fake:{settings.EMBEDDING_MODEL}'
+    return settings.EMBEDDING_MODEL
+
+
+def create_embedding_model() -> Embeddings:
+    if settings.EMBEDDING_PROVIDER == 'fake':
+        return HashEmbeddings(latency_ms=settings.FAKE_EMBEDDING_LATENCY_MS)
+
+    return GoogleGenerativeAIEmbeddings(
+        model=settings.EMBEDDING_MODEL, google_api_key=settings.GEMINI_API_KEY,
+    )
+
+
+def create_query_embedding_model() -> Embeddings:
+    embeddings = create_embedding_model()
+    if not settings.EMBEDDING_QUERY_BATCHING_ENABLED:
+        return embeddings
+
+    # Batches go through aembed_documents, which Gemini embeds with the
+    # document task type unless the query one is asked for.
+    query_options = (
+        {} if settings.EMBEDDING_PROVIDER == 'fake'
+        else {'task_type': 'RETRIEVAL_QUERY'}
+    )
+    return BatchedQueryEmbeddings(
+        embeddings,
+        window_ms=settings.EMBEDDING_QUERY_BATCH_WINDOW_MS,
+        max_batch_size=settings.EMBEDDING_QUERY_BATCH_MAX_SIZE,
+        query_options=query_options,
+    )
+
+
+def create_chat_model() -> BaseChatModel:
+    if settings.LLM_PROVIDER == 'fake':
+        return FakeStreamingChatModel(
+            ttft_ms=settings.FAKE_LLM_TTFT_MS,
+            token_latency_ms=settings.FAKE_LLM_TOKEN_LATENCY_MS,
+            response_tokens=settings.FAKE_LLM_RESPONSE_TOKENS,
+        )
+
+    return ChatGoogleGenerativeAI(
+        model=settings.LLM_MODEL,
+        google_api_key=settings.GEMINI_API_KEY,
+        convert_system_message_to_human=True,
+    )
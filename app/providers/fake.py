@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import random
+import re
+from functools import lru_cache
+from typing import Any
+from typing import AsyncIterator
+from typing import Iterator
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessageChunk
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.outputs import ChatResult
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=65536)
+def _word_vector(word: str, dimensions: int) -> np.ndarray:
+    digest = hashlib.sha256(word.encode('utf-8')).digest()
+    rng = random.Random(int.from_bytes(digest[:8], 'big'))
+    vector = np.array([rng.gauss(0.0, 1.0) for _ in range(dimensions)])
+    # Shared through the cache, so it must not be modified in place.
+    vector.setflags(write=False)
+    return vector
+
+
+class HashEmbeddings(Embeddings):
+    # Deterministic bag-of-words vectors: every word maps to a fixed random
+    # vector and a text embeds to the normalized sum, so texts sharing words
+    # land close together and retrieval behaves plausibly without an API.
+
+    def __init__(self, dimensions: int = 768, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+
+    def _embed(self, text: str) -> list[float]:
+        words = _WORD_PATTERN.findall(text.casefold())
+        if not words:
+            return [1.0 / np.sqrt(self.dimensions)] * self.dimensions
+        vector = np.sum(
+            [_word_vector(word, self.dimensions) for word in words], axis=0,
+        )
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return [1.0 / np.sqrt(self.dimensions)] * self.dimensions
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        # Ingestion batches run to hundreds of chunks; embedding them off
+        # the event loop keeps concurrent chat requests responsive.
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return self.embed_query(text)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    # Streams a canned answer built from the words of the prompt, waiting
+    # ttft_ms before the first token and token_latency_ms between tokens.
+
+    ttft_ms: float = 200.0
+    token_latency_ms: float = 20.0
+    response_tokens: int = 50
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-streaming-chat'
+
+    def _tokens(self, messages: list[BaseMessage]) -> list[str]:
+        words = _WORD_PATTERN.findall(str(messages[-1].content)) or ['ok']
+        return [
+            words[i % len(words)] + ' ' for i in range(self.response_tokens)
+        ]
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content = ''.join(self._tokens(messages))
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))],
+        )
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for token in self._tokens(messages):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.ttft_ms / 1000)
+        for i, token in enumerate(self._tokens(messages)):
+            if i and self.token_latency_ms:
+                await asyncio.sleep(self.token_latency_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
@@ -1,17 +1,63 @@
 from __future__ import annotations
 
+from .schema import AuditFeedbackInput
+from .schema import AuditFeedbackStats
+from .schema import AuditLatencyStats
 from .schema import AuditLogOutput
+from .schema import AuditLogPage
+from .schema import AuditLogSummary
+from .schema import AuditRequestBucket
+from .schema import AuditRequestStats
+from .schema import AuditWriterStats
+from .schema import ChatCoalescingStats
 from .schema import ChatInput
+from .schema import ChatSessionOutput
+from .schema import ChatTurnOutput
+from .schema import CollectionInput
+from .schema import CollectionOutput
+from .schema import DbPoolStats
 from .schema import DocumentInput
+from .schema import DocumentListPage
 from .schema import DocumentMetadataOutput
 from .schema import DocumentUploadRequest
+from .schema import EmbeddingCacheStats
 from .schema import GeneralStatusResponse
+from .schema import IngestionJobOutput
+from .schema import IngestionSummary
+from .schema import LatencyPercentiles
+from .schema import PoolStats
+from .schema import SemanticCacheStats
+from .schema import SourceSummary
+from .schema import VectorIndexStatus
 
 __all__ = [
     'DocumentInput',
     'DocumentUploadRequest',
     'DocumentMetadataOutput',
+    'DocumentListPage',
+    'SourceSummary',
+    'IngestionSummary',
+    'IngestionJobOutput',
     'GeneralStatusResponse',
     'ChatInput',
+    'ChatCoalescingStats',
+    'ChatSessionOutput',
+    'ChatTurnOutput',
+    'CollectionInput',
+    'CollectionOutput',
     'AuditLogOutput',
+    'AuditLogSummary',
+    'AuditLogPage',
+    'AuditFeedbackInput',
+    'AuditLatencyStats',
+    'AuditRequestBucket',
+    'AuditRequestStats',
+    'AuditFeedbackStats',
+    'LatencyPercentiles',
+    'AuditWriterStats',
+    'VectorIndexStatus',
+    'EmbeddingCacheStats',
+    'SemanticCacheStats',
+    'PoolStats',
+    'DbPoolStats',
 ]
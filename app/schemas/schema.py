@@ -2,19 +2,89 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import Any
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel
+from pydantic import Field
+from pydantic import model_validator
+
+from app.db import COLLECTION_NAME_PATTERN
+from app.db import DEFAULT_COLLECTION
 
 
 class DocumentInput(BaseModel):
     source_id: str | None = None
     content: str
     metadata: dict[str, Any] | None = None
+    chunk_size: int | None = Field(default=None, ge=1)
+    chunk_overlap: int | None = Field(default=None, ge=0)
+
+    @model_validator(mode='after')
+    def check_chunk_overlap(self) -> DocumentInput:
+        if (
+            self.chunk_size is not None
+            and self.chunk_overlap is not None
+            and self.chunk_overlap >= self.chunk_size
+        ):
+            raise ValueError('chunk_overlap must be smaller than chunk_size')
+        return self
 
 
 class DocumentUploadRequest(BaseModel):
     documents: list[DocumentInput]
+    collection: str = Field(
+        default=DEFAULT_COLLECTION, pattern=COLLECTION_NAME_PATTERN,
+    )
+
+
+class CollectionInput(BaseModel):
+    name: str = Field(pattern=COLLECTION_NAME_PATTERN)
+
+
+class CollectionOutput(BaseModel):
+    name: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class IngestionSummary(BaseModel):
+    inserted: int = 0
+    unchanged: int = 0
+    # Same content, new chunk_index or metadata.
+    updated: int = 0
+    deleted: int = 0
+    embedded: int = 0
+    reused_embeddings: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+
+class IngestionJobOutput(BaseModel):
+    id: UUID
+    status: str
+    source_id: str | None = None
+    collection: str = DEFAULT_COLLECTION
+    filename: str | None = None
+    size_bytes: int | None = None
+    chunk_size: int | None = None
+    chunk_overlap: int | None = None
+    chunks_split: int = 0
+    chunks_embedded: int = 0
+    chunks_stored: int = 0
+    summary: IngestionSummary | None = None
+    error: str | None = None
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
 
 
 class DocumentMetadataOutput(BaseModel):
@@ -22,11 +92,25 @@ class DocumentMetadataOutput(BaseModel):
     size: int
     created_at: datetime
     doc_metadata: dict[str, Any] | None
+    source_id: str | None = None
+    chunk_index: int | None = None
 
     class Config:
         from_attributes = True
 
 
+class DocumentListPage(BaseModel):
+    items: list[DocumentMetadataOutput]
+    next_cursor: str | None = None
+
+
+class SourceSummary(BaseModel):
+    source_id: str | None
+    chunk_count: int
+    total_size: int
+    last_updated: datetime | None
+
+
 class GeneralStatusResponse(BaseModel):
 
     status: str
@@ -36,6 +120,101 @@ class GeneralStatusResponse(BaseModel):
 class ChatInput(BaseModel):
     question: str
     history: list[dict[str, str]] = []
+    ef_search: int | None = Field(default=None, ge=1, le=1000)
+    probes: int | None = Field(default=None, ge=1)
+    bypass_cache: bool = False
+    retrieval_mode: Literal['vector', 'hybrid'] | None = None
+    filters: dict[str, Any] | None = None
+    collection: str = Field(
+        default=DEFAULT_COLLECTION, pattern=COLLECTION_NAME_PATTERN,
+    )
+    # With a session the server keeps the history; 'history' is ignored.
+    session_id: UUID | None = None
+
+
+class ChatTurnOutput(BaseModel):
+    turn_index: int
+    question: str
+    response: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ChatSessionOutput(BaseModel):
+    session_id: UUID
+    summary: str | None = None
+    summarized_turns: int = 0
+    turns: list[ChatTurnOutput] = []
+
+
+class VectorIndexStatus(BaseModel):
+    index_type: str
+    storage: str
+    definition: str | None = None
+    is_valid: bool | None = None
+    size_bytes: int | None = None
+    partitions: int = 0
+
+
+class EmbeddingCacheStats(BaseModel):
+    enabled: bool
+    persistent: bool
+    size: int
+    max_size: int
+    hits: int
+    persistent_hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+
+class SemanticCacheStats(BaseModel):
+    enabled: bool
+    threshold: float
+    hits: int
+    misses: int
+    bypassed: int
+    stores: int
+    stale_skips: int
+    invalidations: int
+    hit_rate: float
+
+
+class ChatCoalescingStats(BaseModel):
+    enabled: bool
+    in_flight: int
+    runs: int
+    coalesced: int
+    llm_calls_saved: int
+
+
+class PoolStats(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class DbPoolStats(BaseModel):
+    primary: PoolStats
+    replica: PoolStats | None = None
+
+
+class AuditWriterStats(BaseModel):
+    running: bool
+    backlog: int
+    max_queue_size: int
+    enqueued: int
+    written: int
+    batches: int
+    dropped: int
+    failed: int
 
 
 class AuditLogOutput(BaseModel):
@@ -44,8 +223,68 @@ class AuditLogOutput(BaseModel):
     response: str
     retrieved_docs: list[dict[str, Any]]
     latency_ms: float
+    stage_timings: dict[str, float] | None = None
+    timestamp: datetime
+    feedback: str | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class AuditLogSummary(BaseModel):
+    chat_id: UUID
+    question: str
+    latency_ms: float
     timestamp: datetime
     feedback: str | None = None
 
     class Config:
         from_attributes = True
+
+
+class AuditLogPage(BaseModel):
+    items: list[AuditLogSummary]
+    next_cursor: str | None = None
+
+
+class AuditFeedbackInput(BaseModel):
+    feedback: Literal['positive', 'negative']
+
+
+class LatencyPercentiles(BaseModel):
+    count: int
+    mean_ms: float | None = None
+    p50_ms: float | None = None
+    p95_ms: float | None = None
+    p99_ms: float | None = None
+
+
+class AuditLatencyStats(BaseModel):
+    since: datetime
+    until: datetime
+    total: LatencyPercentiles
+    stages: dict[str, LatencyPercentiles]
+
+
+class AuditRequestBucket(BaseModel):
+    bucket: datetime
+    requests: int
+    mean_latency_ms: float
+    p95_latency_ms: float
+
+
+class AuditRequestStats(BaseModel):
+    since: datetime
+    until: datetime
+    interval: str
+    buckets: list[AuditRequestBucket]
+
+
+class AuditFeedbackStats(BaseModel):
+    since: datetime
+    until: datetime
+    requests: int
+    rated: int
+    counts: dict[str, int]
+    rated_ratio: float
+    positive_ratio: float | None = None
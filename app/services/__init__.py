@@ -1,6 +1,21 @@
 from __future__ import annotations
 
+from .audit_retention import audit_retention_job
+from .audit_service import audit_service
+from .audit_writer import audit_log_writer
 from .chat_service import chat_service
+from .collection_service import collection_service
+from .ingestion_jobs import ingestion_job_manager
 from .knowledge_service import knowledge_service
+from .session_service import session_service
 
-__all__ = ['chat_service', 'knowledge_service']
+__all__ = [
+    'audit_log_writer',
+    'audit_retention_job',
+    'audit_service',
+    'chat_service',
+    'collection_service',
+    'ingestion_job_manager',
+    'knowledge_service',
+    'session_service',
+]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.core import settings
+from app.db import async_engine
+from app.db import maintain_audit_partitions
+
+logger = logging.getLogger(__name__)
+
+
+class AuditRetentionJob:
+    # Keeps the daily audit_logs partitions a few days ahead of the clock
+    # and drops the ones past retention, once at start-up and then on every
+    # interval.
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run_once(self) -> tuple[list[str], list[str]]:
+        async with async_engine.begin() as conn:
+            return await maintain_audit_partitions(conn)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception('Audit partition maintenance failed')
+            await asyncio.sleep(self.interval)
+
+
+audit_retention_job = AuditRetentionJob(
+    interval=settings.AUDIT_MAINTENANCE_INTERVAL_SECONDS,
+)
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import tuple_
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import decode_cursor
+from app.core.pagination import encode_cursor
+from app.db import AuditLog
+from app.schemas import AuditFeedbackStats
+from app.schemas import AuditLatencyStats
+from app.schemas import AuditLogPage
+from app.schemas import AuditLogSummary
+from app.schemas import AuditRequestBucket
+from app.schemas import AuditRequestStats
+from app.schemas import LatencyPercentiles
+
+_DEFAULT_WINDOW = timedelta(hours=24)
+_WINDOW_FILTER = 'timestamp >= :since AND timestamp < :until'
+
+
+def _percentiles_sql(expression: str) -> str:
+    return (
+        f'count(*) AS count, avg({expression}) AS mean_ms, '
+        f'percentile_cont(0.5) WITHIN GROUP (ORDER BY {expression}) '
+        f'AS p50_ms, '
+        f'percentile_cont(0.95) WITHIN GROUP (ORDER BY {expression}) '
+        f'AS p95_ms, '
+        f'percentile_cont(0.99) WITHIN GROUP (ORDER BY {expression}) '
+        f'AS p99_ms'
+    )
+
+
+def _to_utc(value: datetime | None) -> datetime | None:
+    # Audit timestamps are stored as naive UTC.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _window(
+    since: datetime | None, until: datetime | None,
+) -> dict[str, datetime]:
+    until = _to_utc(until) or datetime.utcnow()
+    since = _to_utc(since) or until - _DEFAULT_WINDOW
+    if since >= until:
+        raise ValueError('since must be earlier than until')
+    return {'since': since, 'until': until}
+
+
+class AuditService:
+    # Every aggregate is bounded by a time window, so the planner only
+    # reads the daily partitions that overlap it.
+
+    async def list_logs(
+        self,
+        db: AsyncSession,
+        limit: int = 100,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        feedback: str | None = None,
+    ) -> AuditLogPage:
+        # Newest first; responses and retrieved documents are left out of
+        # the listing and fetched per chat through GET /audit/{chat_id}.
+        stmt = (
+            select(
+                AuditLog.chat_id,
+                AuditLog.question,
+                AuditLog.latency_ms,
+                AuditLog.timestamp,
+                AuditLog.feedback,
+            )
+            .order_by(AuditLog.timestamp.desc(), AuditLog.chat_id.desc())
+            .limit(limit + 1)
+        )
+        if since is not None:
+            stmt = stmt.where(AuditLog.timestamp >= _to_utc(since))
+        if until is not None:
+            stmt = stmt.where(AuditLog.timestamp < _to_utc(until))
+        if feedback is not None:
+            stmt = stmt.where(AuditLog.feedback == feedback)
+        if cursor is not None:
+            timestamp, chat_id = decode_cursor(cursor)
+            # The row comparison alone does not prune partitions; the plain
+            # bound on timestamp does.
+            stmt = stmt.where(
+                AuditLog.timestamp <= timestamp,
+                tuple_(AuditLog.timestamp, AuditLog.chat_id)
+                < tuple_(timestamp, chat_id),
+            )
+
+        rows = (await db.execute(stmt)).mappings().all()
+        items = [AuditLogSummary(**row) for row in rows[:limit]]
+        next_cursor = (
+            encode_cursor(items[-1].timestamp, items[-1].chat_id)
+            if len(rows) > limit else None
+        )
+        return AuditLogPage(items=items, next_cursor=next_cursor)
+
+    async def set_feedback(
+        self, db: AsyncSession, chat_id: UUID, feedback: str,
+    ) -> bool:
+        result = await db.execute(
+            update(AuditLog)
+            .where(AuditLog.chat_id == chat_id)
+            .values(feedback=feedback),
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    async def latency_stats(
+        self,
+        db: AsyncSession,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> AuditLatencyStats:
+        window = _window(since, until)
+        total = (
+            await db.execute(
+                text(
+                    f'SELECT {_percentiles_sql("latency_ms")} '
+                    f'FROM audit_logs WHERE {_WINDOW_FILTER}',
+                ),
+                window,
+            )
+        ).mappings().one()
+        stages = await db.execute(
+            text(
+                f'SELECT stage.key AS stage, '
+                f'{_percentiles_sql("CAST(stage.value AS float8)")} '
+                f'FROM audit_logs, json_each_text(stage_timings) AS stage '
+                f'WHERE {_WINDOW_FILTER} '
+                f"AND json_typeof(stage_timings) = 'object' "
+                f'GROUP BY stage.key ORDER BY stage.key',
+            ),
+            window,
+        )
+        return AuditLatencyStats(
+            **window,
+            total=LatencyPercentiles(**total),
+            stages={
+                row['stage']: LatencyPercentiles(**row)
+                for row in stages.mappings().all()
+            },
+        )
+
+    async def request_stats(
+        self,
+        db: AsyncSession,
+        interval: str = 'hour',
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> AuditRequestStats:
+        window = _window(since, until)
+        result = await db.execute(
+            text(
+                'SELECT date_trunc(:interval, timestamp) AS bucket, '
+                'count(*) AS requests, '
+                'avg(latency_ms) AS mean_latency_ms, '
+                'percentile_cont(0.95) WITHIN GROUP (ORDER BY latency_ms) '
+                'AS p95_latency_ms '
+                f'FROM audit_logs WHERE {_WINDOW_FILTER} '
+                'GROUP BY bucket ORDER BY bucket',
+            ),
+            {**window, 'interval': interval},
+        )
+        return AuditRequestStats(
+            **window,
+            interval=interval,
+            buckets=[
+                AuditRequestBucket(**row) for row in result.mappings().all()
+            ],
+        )
+
+    async def feedback_stats(
+        self,
+        db: AsyncSession,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> AuditFeedbackStats:
+        window = _window(since, until)
+        result = await db.execute(
+            text(
+                'SELECT feedback, count(*) AS count '
+                f'FROM audit_logs WHERE {_WINDOW_FILTER} '
+                'GROUP BY feedback',
+            ),
+            window,
+        )
+        counts = {row.feedback: row.count for row in result}
+        requests = sum(counts.values())
+        unrated = counts.pop(None, 0)
+        rated = requests - unrated
+        return AuditFeedbackStats(
+            **window,
+            requests=requests,
+            rated=rated,
+            counts=counts,
+            rated_ratio=rated / requests if requests else 0.0,
+            positive_ratio=(
+                counts.get('positive', 0) / rated if rated else None
+            ),
+        )
+
+
+audit_service = AuditService()
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from sqlalchemy import insert
+
+from app.core import settings
+from app.core.metrics import AUDIT_WRITE_BATCH_SIZE
+from app.core.metrics import AUDIT_WRITE_SECONDS
+from app.db import AsyncSessionLocal
+from app.db import AuditLog
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+
+    def __init__(
+        self,
+        max_queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        max_retries: int,
+        write_timeout: float,
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.write_timeout = write_timeout
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        if self._task is None:
+            return
+
+        # The timeout covers queueing the sentinel as well: with a full
+        # queue behind a stalled database, put() alone would never return.
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            await asyncio.wait_for(self._queue.put(_STOP), timeout=timeout)
+            await asyncio.wait_for(
+                self._task, timeout=max(deadline - loop.time(), 0),
+            )
+        except asyncio.TimeoutError:
+            logger.error(
+                'Audit writer did not drain before shutdown; '
+                '%d entries lost', self._queue.qsize(),
+            )
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def submit(self, entry: dict[str, Any]) -> bool:
+        # Never blocks the caller: when the database falls behind and the
+        # queue is full, the entry is counted as dropped instead of
+        # stalling the chat stream that produced it.
+        self.start()
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                break
+
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            await self._write(batch)
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    self._insert(batch), timeout=self.write_timeout,
+                )
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += len(batch)
+                    logger.error('Dropping %d audit logs: %s', len(batch), e)
+                    return
+                logger.warning(
+                    'Audit log write failed, retry %d/%d: %s',
+                    attempt + 1, self.max_retries, e,
+                )
+                await asyncio.sleep(self.flush_interval * (2 ** attempt))
+            else:
+                AUDIT_WRITE_SECONDS.observe(time.perf_counter() - start)
+                AUDIT_WRITE_BATCH_SIZE.observe(len(batch))
+                self.written += len(batch)
+                self.batches += 1
+                return
+
+    async def _insert(self, batch: list[dict[str, Any]]) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(AuditLog), batch)
+            await db.commit()
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            'running': self._task is not None,
+            'backlog': self._queue.qsize() if self._queue else 0,
+            'max_queue_size': self.max_queue_size,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+audit_log_writer = AuditLogWriter(
+    max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_retries=settings.AUDIT_WRITE_MAX_RETRIES,
+    write_timeout=settings.AUDIT_WRITE_TIMEOUT_SECONDS,
+)
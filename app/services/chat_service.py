@@ -1,52 +1,295 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import logging
 import time
 import uuid
+from datetime import datetime
+from typing import Any
 from typing import AsyncGenerator
+from typing import AsyncIterator
+from uuid import UUID
 
+from langchain_core.messages import AIMessageChunk
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import AuditLog
+from .audit_writer import audit_log_writer
+from .session_service import session_service
+from .session_service import trim_history
+from app.core import settings
+from app.core.metrics import CHAT_COALESCED_REQUESTS
+from app.core.metrics import CHAT_GRAPH_RUNS
+from app.core.metrics import CHAT_LLM_CALLS_SAVED
+from app.core.metrics import CHAT_RUN_SUBSCRIBERS
+from app.core.metrics import observe_stage_timings
+from app.db import AsyncSessionLocal
+from app.db import DEFAULT_COLLECTION
+from app.db import ReadSessionLocal
 from app.graph import get_graph_runnable
 
+logger = logging.getLogger(__name__)
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def _flight_key(
+    question: str,
+    history: list[dict[str, str]],
+    summary: str | None,
+    options: dict[str, Any],
+) -> str:
+    payload = json.dumps(
+        [' '.join(question.lower().split()), history, summary, options],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    # One graph run and the requests it answers. Chunks are kept, so a
+    # request that joins late replays the stream from the start before
+    # following it live.
+
+    def __init__(self, key: str):
+        self.key = key
+        self.chunks: list[str] = []
+        self.response = ''
+        self.retrieved_docs: list[dict[str, Any]] = []
+        self.timings: dict[str, float] = {}
+        self.generated = False
+        self.subscribers = 0
+        self.joined = 0
+        self.done = False
+        self.error: Exception | None = None
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self) -> None:
+        self.done = True
+        self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def stream(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            if index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            elif self.done:
+                break
+            else:
+                await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+
 
 class ChatService:
 
+    def __init__(self, coalescing: bool = True):
+        self.coalescing = coalescing
+        self._flights: dict[str, _Flight] = {}
+        self.runs = 0
+        self.coalesced = 0
+        self.llm_calls_saved = 0
+
+    def _join(self, key: str, initial_input: dict[str, Any]) -> _Flight:
+        flight = self._flights.get(key) if self.coalescing else None
+        if flight is None:
+            flight = _Flight(key)
+            flight.task = asyncio.create_task(
+                self._run(flight, initial_input),
+            )
+            if self.coalescing:
+                self._flights[key] = flight
+            self.runs += 1
+            CHAT_GRAPH_RUNS.inc()
+        else:
+            self.coalesced += 1
+            CHAT_COALESCED_REQUESTS.inc()
+        flight.subscribers += 1
+        flight.joined += 1
+        return flight
+
+    def _leave(self, flight: _Flight) -> None:
+        flight.subscribers -= 1
+        if flight.subscribers == 0 and not flight.done:
+            # Every client has gone away; the run is stopped like a single
+            # request's graph stream would be.
+            self._forget(flight)
+            flight.task.cancel()
+
+    def _forget(self, flight: _Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    async def _run(
+        self, flight: _Flight, initial_input: dict[str, Any],
+    ) -> None:
+        # The run owns its database sessions: it outlives the request that
+        # started it whenever that client disconnects before the others.
+        try:
+            async with AsyncSessionLocal() as db:
+                async with ReadSessionLocal() as read_db:
+                    await self._stream_graph(
+                        flight, initial_input, {'db': db, 'read_db': read_db},
+                    )
+        except Exception as e:
+            flight.error = e
+        finally:
+            self._forget(flight)
+            flight.finish()
+
+        # Shared stages are recorded once per run; each request records its
+        # own first_token and total.
+        observe_stage_timings(flight.timings)
+        CHAT_RUN_SUBSCRIBERS.observe(flight.joined)
+        if flight.generated and flight.joined > 1:
+            self.llm_calls_saved += flight.joined - 1
+            CHAT_LLM_CALLS_SAVED.inc(flight.joined - 1)
+
+    async def _stream_graph(
+        self,
+        flight: _Flight,
+        initial_input: dict[str, Any],
+        configurable: dict[str, AsyncSession],
+    ) -> None:
+        graph = get_graph_runnable()
+        async for mode, payload in graph.astream(
+            initial_input,
+            config={'configurable': configurable},
+            stream_mode=['messages', 'updates'],
+        ):
+            if mode == 'messages':
+                message_chunk, metadata = payload
+                if (
+                    metadata.get('langgraph_node') == 'generate'
+                    and isinstance(message_chunk, AIMessageChunk)
+                    and message_chunk.content
+                ):
+                    flight.publish(message_chunk.content)
+                continue
+
+            for node_update in payload.values():
+                if node_update and 'timings' in node_update:
+                    flight.timings.update(node_update['timings'])
+
+            cache_update = payload.get('check_cache')
+            if cache_update and cache_update['cache_hit']:
+                flight.response = cache_update['response']
+                flight.retrieved_docs = cache_update['retrieved_docs']
+                flight.publish(flight.response)
+
+            if 'generate' in payload:
+                flight.generated = True
+                flight.response = payload['generate'].get('response', '')
+
+            if 'build_context' in payload:
+                flight.retrieved_docs = payload['build_context'].get(
+                    'retrieved_docs', [],
+                )
+
     async def stream_chat(
-        self, question: str, history: list[dict[str, str]], db: AsyncSession,
+        self,
+        question: str,
+        history: list[dict[str, str]],
+        db: AsyncSession,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        bypass_cache: bool = False,
+        retrieval_mode: str | None = None,
+        filters: dict[str, Any] | None = None,
+        session_id: UUID | None = None,
+        collection: str = DEFAULT_COLLECTION,
     ) -> AsyncGenerator[str, None]:
-        start_time = time.time()
+        start_time = time.perf_counter()
         chat_id = uuid.uuid4()
 
-        graph = get_graph_runnable(db)
-
-        full_response = ''
-        retrieved_docs = []
+        summary = None
+        if session_id is not None:
+            # Read from the primary so the previous turn is always visible,
+            # then release the connection before the graph runs.
+            summary, history = await session_service.load_context(
+                db, session_id,
+            )
+            await db.rollback()
+        else:
+            history = trim_history(history, settings.HISTORY_TOKEN_BUDGET)
 
-        initial_input = {'question': question, 'chat_history': history}
+        options = {
+            'ef_search': ef_search,
+            'probes': probes,
+            'bypass_cache': bypass_cache,
+            'retrieval_mode': retrieval_mode,
+            'filters': filters,
+            'collection': collection,
+        }
+        flight = self._join(
+            _flight_key(question, history, summary, options),
+            {
+                'question': question,
+                'chat_history': history,
+                'conversation_summary': summary,
+                **options,
+            },
+        )
+        coalesced = flight.joined > 1
 
-        async for event in graph.astream(initial_input):
-            if 'generate' in event:
-                response_chunk = event['generate'].get('response', '')
-                full_response = response_chunk
-                yield response_chunk
+        timings: dict[str, float] = {}
+        try:
+            async for chunk in flight.stream():
+                timings.setdefault('first_token', _elapsed_ms(start_time))
+                yield chunk
+        finally:
+            self._leave(flight)
 
-            if 'retrieve' in event:
-                retrieved_docs = event['retrieve'].get('retrieved_docs', [])
+        if session_id is not None and flight.response:
+            await session_service.append_turn(
+                db, session_id, question, flight.response,
+            )
 
-        latency_ms = (time.time() - start_time) * 1000
+        latency_ms = _elapsed_ms(start_time)
+        timings['total'] = latency_ms
+        observe_stage_timings(timings)
+        stage_timings = {**flight.timings, **timings}
 
-        audit_log = AuditLog(
-            chat_id=chat_id,
-            question=question,
-            response=full_response,
-            retrieved_docs=retrieved_docs,
-            latency_ms=latency_ms,
+        audit_log_writer.submit({
+            'chat_id': chat_id,
+            'question': question,
+            'response': flight.response,
+            'retrieved_docs': flight.retrieved_docs,
+            'latency_ms': latency_ms,
+            'stage_timings': stage_timings,
+            'timestamp': datetime.utcnow(),
+        })
+        logger.info(
+            'Chat completed',
+            extra={
+                'chat_id': str(chat_id),
+                'coalesced': coalesced,
+                'stage_timings': stage_timings,
+            },
         )
 
-        db.add(audit_log)
-        await db.commit()
-        print(f'Audit log saved for chat_id: {chat_id}')
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            'enabled': self.coalescing,
+            'in_flight': len(self._flights),
+            'runs': self.runs,
+            'coalesced': self.coalesced,
+            'llm_calls_saved': self.llm_calls_saved,
+        }
 
 
-chat_service = ChatService()
+chat_service = ChatService(coalescing=settings.CHAT_COALESCING_ENABLED)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import delete
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import semantic_cache
+from app.db import async_engine
+from app.db import Collection
+from app.db import create_partition
+from app.db import DEFAULT_COLLECTION
+from app.db import detach_partition
+from app.db import drop_partition
+from app.db import truncate_partition
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionService:
+    # Creating a partition runs in the caller's transaction together with
+    # the registry row, so a collection either exists with its partition
+    # and vector index or not at all. Dropping detaches concurrently first
+    # and removes the table and the row together afterwards; a failed drop
+    # can simply be retried.
+
+    async def list_collections(self, db: AsyncSession) -> list[Collection]:
+        result = await db.execute(select(Collection).order_by(Collection.name))
+        return list(result.scalars().all())
+
+    async def get_collection(
+        self, db: AsyncSession, name: str,
+    ) -> Collection | None:
+        return await db.get(Collection, name)
+
+    async def create_collection(
+        self, db: AsyncSession, name: str,
+    ) -> Collection | None:
+        if await db.get(Collection, name) is not None:
+            return None
+        collection = Collection(name=name)
+        db.add(collection)
+        try:
+            await db.flush()
+        except IntegrityError:
+            # Lost the race against a concurrent create of the same name.
+            await db.rollback()
+            return None
+        await create_partition(await db.connection(), name)
+        await db.commit()
+        logger.info('Collection created', extra={'collection': name})
+        return collection
+
+    async def clear_collection(self, db: AsyncSession, name: str) -> None:
+        await truncate_partition(await db.connection(), name)
+        await semantic_cache.invalidate(db, name)
+        await db.commit()
+        logger.info('Collection cleared', extra={'collection': name})
+
+    async def drop_collection(self, db: AsyncSession, name: str) -> bool:
+        if name == DEFAULT_COLLECTION:
+            raise ValueError('The default collection cannot be dropped.')
+        if await db.get(Collection, name) is None:
+            return False
+        # The detach waits for transactions using documents to finish, so
+        # nothing is kept open across it.
+        await db.rollback()
+        await detach_partition(async_engine, name)
+        await drop_partition(await db.connection(), name)
+        await semantic_cache.invalidate(db, name)
+        await db.execute(delete(Collection).where(Collection.name == name))
+        await db.commit()
+        logger.info('Collection dropped', extra={'collection': name})
+        return True
+
+
+collection_service = CollectionService()
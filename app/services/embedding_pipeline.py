@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from typing import AsyncIterator
+
+from google.api_core import exceptions as google_exceptions
+from langchain_core.embeddings import Embeddings
+
+from app.core import settings
+from app.core.metrics import EMBEDDING_RETRIES
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_EXCEPTIONS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+)
+_RETRYABLE_MARKERS = (
+    '429', 'resource exhausted', 'rate limit', 'quota', '503',
+)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    # The LangChain Gemini wrapper re-raises provider errors as
+    # GoogleGenerativeAIError, so the original cause has to be unwrapped.
+    while exc is not None:
+        if isinstance(exc, _RETRYABLE_EXCEPTIONS):
+            return True
+        if any(marker in str(exc).lower() for marker in _RETRYABLE_MARKERS):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+async def _embed_batch_with_retry(
+    embedding_model: Embeddings,
+    texts: list[str],
+    semaphore: asyncio.Semaphore,
+    max_retries: int,
+    base_delay: float,
+) -> list[list[float]]:
+    attempt = 0
+    while True:
+        try:
+            async with semaphore:
+                return await embedding_model.aembed_documents(texts)
+        except Exception as e:
+            if attempt >= max_retries or not _is_retryable(e):
+                raise
+            delay = base_delay * (2 ** attempt) + random.uniform(0, base_delay)
+            attempt += 1
+            EMBEDDING_RETRIES.inc()
+            logger.warning(
+                'Embedding batch rate limited, retry %d/%d in %.1fs: %s',
+                attempt, max_retries, delay, e,
+            )
+            await asyncio.sleep(delay)
+
+
+async def embed_in_batches(
+    embedding_model: Embeddings,
+    texts: list[str],
+    batch_size: int | None = None,
+    concurrency: int | None = None,
+    max_retries: int | None = None,
+    base_delay: float | None = None,
+) -> AsyncIterator[tuple[int, list[list[float]]]]:
+    batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+    semaphore = asyncio.Semaphore(
+        concurrency or settings.EMBEDDING_CONCURRENCY,
+    )
+    max_retries = (
+        settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+    )
+    base_delay = (
+        settings.EMBEDDING_RETRY_BASE_DELAY if base_delay is None
+        else base_delay
+    )
+
+    async def run(start: int) -> tuple[int, list[list[float]]]:
+        embeddings = await _embed_batch_with_retry(
+            embedding_model,
+            texts[start:start + batch_size],
+            semaphore,
+            max_retries,
+            base_delay,
+        )
+        return start, embeddings
+
+    tasks = [
+        asyncio.create_task(run(start))
+        for start in range(0, len(texts), batch_size)
+    ]
+    try:
+        # Batches are handed back in completion order, tagged with their
+        # offset into ``texts``, so callers can persist them immediately.
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import socket
+import time
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from typing import BinaryIO
+from uuid import UUID
+from uuid import uuid4
+
+from sqlalchemy import ColumnElement
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .knowledge_service import knowledge_service
+from app.core import settings
+from app.db import AsyncSessionLocal
+from app.db import DEFAULT_COLLECTION
+from app.db import IngestionJob
+from app.schemas import DocumentInput
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('succeeded', 'failed', 'cancelled')
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class IngestionCancelled(Exception):
+    pass
+
+
+def _spool_to_disk(source: BinaryIO, path: str) -> int:
+    with open(path, 'wb') as target:
+        shutil.copyfileobj(source, target, _COPY_BUFFER_SIZE)
+        return target.tell()
+
+
+def _read_text(path: str) -> str:
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def _remove_spool_file(path: str | None) -> None:
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+class _ProgressTracker:
+    # Progress is kept in memory and flushed to the job row at most once per
+    # interval. The flush also picks up cancellations requested through the
+    # database, so a cancel reaches the worker even from another process.
+
+    def __init__(self, manager: IngestionJobManager, job_id: UUID):
+        self.manager = manager
+        self.job_id = job_id
+        self.counts = {'split': 0, 'embedded': 0, 'stored': 0}
+        self._last_flush = time.monotonic()
+
+    async def __call__(self, stage: str, count: int) -> None:
+        self.counts[stage] += count
+        if self.manager.is_cancelled(self.job_id):
+            raise IngestionCancelled()
+        if (
+            time.monotonic() - self._last_flush
+            >= self.manager.progress_interval
+        ):
+            await self.flush()
+
+    async def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == self.job_id)
+                .values(
+                    chunks_split=self.counts['split'],
+                    chunks_embedded=self.counts['embedded'],
+                    chunks_stored=self.counts['stored'],
+                    heartbeat_at=datetime.utcnow(),
+                )
+                .returning(IngestionJob.cancel_requested),
+            )
+            cancel_requested = result.scalar_one_or_none()
+            await db.commit()
+        if cancel_requested:
+            raise IngestionCancelled()
+
+
+class IngestionJobManager:
+
+    def __init__(
+        self,
+        workers: int,
+        spool_dir: str,
+        progress_interval: float,
+        lease: float,
+        spool_owner: str,
+    ):
+        self.workers = workers
+        self.spool_dir = spool_dir
+        self.progress_interval = progress_interval
+        self.lease = lease
+        self.spool_owner = spool_owner
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._cancelled: set[UUID] = set()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.workers)
+        ]
+        await self._requeue_unfinished()
+        self._tasks.append(asyncio.create_task(self._reap_expired()))
+
+    async def stop(self) -> None:
+        # Jobs interrupted here are left queued/running and picked up again
+        # once their lease runs out; the upsert is idempotent per source_id.
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def is_cancelled(self, job_id: UUID) -> bool:
+        return job_id in self._cancelled
+
+    def _owns_spool(self) -> ColumnElement[bool]:
+        # Only jobs whose upload is in this process's spool can be run
+        # here. Rows from before spool owners were recorded are anyone's.
+        return or_(
+            IngestionJob.spool_owner == self.spool_owner,
+            IngestionJob.spool_owner.is_(None),
+        )
+
+    async def _requeue_unfinished(self) -> None:
+        # Claiming is atomic, so a queued job that another process sharing
+        # the spool also picks up still runs only once.
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(IngestionJob.id)
+                .where(IngestionJob.status == 'queued', self._owns_spool())
+                .order_by(IngestionJob.created_at),
+            )
+            job_ids = result.scalars().all()
+
+        for job_id in job_ids:
+            self._queue.put_nowait(job_id)
+        if job_ids:
+            logger.info('Enqueued %d pending ingestion jobs', len(job_ids))
+        await self._requeue_expired()
+
+    async def _requeue_expired(self) -> None:
+        # Only running jobs whose worker stopped heartbeating are taken
+        # back; jobs still held by a live worker, in this process or
+        # another, keep running. A job whose upload sits in another host's
+        # spool waits for that host to come back.
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(IngestionJob)
+                .where(
+                    IngestionJob.status == 'running',
+                    self._owns_spool(),
+                    or_(
+                        IngestionJob.heartbeat_at.is_(None),
+                        IngestionJob.heartbeat_at < cutoff,
+                    ),
+                )
+                .values(status='queued')
+                .returning(IngestionJob.id),
+            )
+            job_ids = result.scalars().all()
+            await db.commit()
+
+        for job_id in job_ids:
+            self._queue.put_nowait(job_id)
+        if job_ids:
+            logger.info(
+                'Requeued %d ingestion jobs with expired leases', len(job_ids),
+            )
+
+    async def _reap_expired(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease)
+            try:
+                await self._requeue_expired()
+            except Exception:
+                logger.exception('Requeueing expired ingestion jobs failed')
+
+    async def _heartbeat(self, job_id: UUID) -> None:
+        # Runs beside the job so the lease is renewed even while a single
+        # embedding call outlasts the progress interval.
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(IngestionJob)
+                        .where(
+                            IngestionJob.id == job_id,
+                            IngestionJob.status == 'running',
+                        )
+                        .values(heartbeat_at=datetime.utcnow()),
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception(
+                    'Ingestion job heartbeat failed',
+                    extra={'job_id': str(job_id)},
+                )
+
+    async def submit(
+        self,
+        db: AsyncSession,
+        file: BinaryIO,
+        filename: str | None,
+        source_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
+        collection: str = DEFAULT_COLLECTION,
+        chunk_size: int | None = None,
+        chunk_overlap: int | None = None,
+    ) -> IngestionJob:
+        job_id = uuid4()
+        file_path = os.path.join(self.spool_dir, f'{job_id}.upload')
+        size_bytes = await asyncio.to_thread(_spool_to_disk, file, file_path)
+
+        job = IngestionJob(
+            id=job_id,
+            status='queued',
+            source_id=source_id,
+            collection=collection,
+            filename=filename,
+            file_path=file_path,
+            spool_owner=self.spool_owner,
+            size_bytes=size_bytes,
+            doc_metadata=metadata,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+        db.add(job)
+        await db.commit()
+
+        self._queue.put_nowait(job_id)
+        return job
+
+    async def get(self, db: AsyncSession, job_id: UUID) -> IngestionJob | None:
+        return await db.get(IngestionJob, job_id)
+
+    async def list_recent(
+        self, db: AsyncSession, limit: int = 20,
+    ) -> list[IngestionJob]:
+        result = await db.execute(
+            select(IngestionJob)
+            .order_by(IngestionJob.created_at.desc())
+            .limit(limit),
+        )
+        return list(result.scalars().all())
+
+    async def cancel(
+        self, db: AsyncSession, job_id: UUID,
+    ) -> IngestionJob | None:
+        job = await db.get(IngestionJob, job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            return job
+
+        job.cancel_requested = True
+        if job.status == 'queued':
+            job.status = 'cancelled'
+            job.finished_at = datetime.utcnow()
+            _remove_spool_file(job.file_path)
+        await db.commit()
+        self._cancelled.add(job_id)
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception(
+                    'Ingestion job crashed', extra={'job_id': str(job_id)},
+                )
+
+    async def _claim(self, job_id: UUID) -> IngestionJob | None:
+        # The conditional update makes claiming atomic, so a job cancelled
+        # while it waited in the queue is never started.
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(IngestionJob)
+                .where(
+                    IngestionJob.id == job_id,
+                    IngestionJob.status == 'queued',
+                    IngestionJob.cancel_requested.is_(False),
+                )
+                .values(
+                    status='running',
+                    started_at=datetime.utcnow(),
+                    heartbeat_at=datetime.utcnow(),
+                    chunks_split=0,
+                    chunks_embedded=0,
+                    chunks_stored=0,
+                )
+                .returning(IngestionJob),
+            )
+            job = result.scalar_one_or_none()
+            await db.commit()
+            return job
+
+    async def _run(self, job_id: UUID) -> None:
+        job = await self._claim(job_id)
+        if job is None:
+            self._cancelled.discard(job_id)
+            return
+
+        tracker = _ProgressTracker(self, job_id)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        values: dict[str, Any] = {}
+        try:
+            content = await asyncio.to_thread(_read_text, job.file_path)
+            document = DocumentInput(
+                source_id=job.source_id,
+                content=content,
+                metadata=job.doc_metadata,
+                chunk_size=job.chunk_size,
+                chunk_overlap=job.chunk_overlap,
+            )
+            async with AsyncSessionLocal() as db:
+                summary = await knowledge_service.upsert_documents(
+                    [document],
+                    db,
+                    progress=tracker,
+                    collection=job.collection,
+                )
+            values = {'status': 'succeeded', 'summary': summary.model_dump()}
+        except IngestionCancelled:
+            values = {'status': 'cancelled'}
+        except Exception as e:
+            logger.exception(
+                'Ingestion job failed', extra={'job_id': str(job_id)},
+            )
+            values = {'status': 'failed', 'error': str(e)}
+        finally:
+            heartbeat.cancel()
+            self._cancelled.discard(job_id)
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id)
+                .values(
+                    **values,
+                    chunks_split=tracker.counts['split'],
+                    chunks_embedded=tracker.counts['embedded'],
+                    chunks_stored=tracker.counts['stored'],
+                    finished_at=datetime.utcnow(),
+                ),
+            )
+            await db.commit()
+        await asyncio.to_thread(_remove_spool_file, job.file_path)
+        logger.info(
+            'Ingestion job finished',
+            extra={'job_id': str(job_id), 'status': values['status']},
+        )
+
+
+ingestion_job_manager = IngestionJobManager(
+    workers=settings.INGESTION_WORKERS,
+    spool_dir=settings.INGESTION_SPOOL_DIR,
+    progress_interval=settings.INGESTION_PROGRESS_INTERVAL_SECONDS,
+    lease=settings.INGESTION_LEASE_SECONDS,
+    spool_owner=settings.INGESTION_SPOOL_OWNER or socket.gethostname(),
+)
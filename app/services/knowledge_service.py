@@ -1,91 +1,366 @@
 # /app/services/knowledge_service.py
 from __future__ import annotations
 
+import hashlib
+import logging
+import time
+from collections import defaultdict
+from contextlib import aclosing
+from typing import Any
+from typing import Awaitable
+from typing import Callable
 from uuid import UUID
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from sqlalchemy import delete
+from sqlalchemy import func
 from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import tuple_
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import semantic_cache
 from app.core import settings
+from app.core.chunking import chunking_pool
+from app.core.metrics import INGESTION_CHUNKS
+from app.core.metrics import INGESTION_SECONDS
+from app.core.pagination import decode_cursor
+from app.core.pagination import encode_cursor
+from app.db import async_engine
+from app.db import build_deferred_index
+from app.db import bulk_insert_documents
+from app.db import DEFAULT_COLLECTION
 from app.db import Document
+from app.providers import create_embedding_model
 from app.schemas import DocumentInput
+from app.schemas import DocumentListPage
 from app.schemas import DocumentMetadataOutput
+from app.schemas import IngestionSummary
+from app.schemas import SourceSummary
+from app.services.embedding_pipeline import embed_in_batches
+
+_HASH_LOOKUP_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+# Receives (stage, count) increments where stage is 'split', 'embedded' or
+# 'stored'; raising from it aborts the upsert before anything is committed.
+ProgressCallback = Callable[[str, int], Awaitable[None]]
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 
 class KnowledgeService:
 
     def __init__(self):
-        self.embedding_model = GoogleGenerativeAIEmbeddings(
-            model=settings.EMBEDDING_MODEL,
-            google_api_key=settings.GEMINI_API_KEY,
+        self.embedding_model = create_embedding_model()
+
+    def _chunking_params(self, doc: DocumentInput) -> tuple[int, int]:
+        chunk_size = doc.chunk_size or settings.CHUNK_SIZE
+        chunk_overlap = doc.chunk_overlap
+        if chunk_overlap is None:
+            # The default overlap is scaled down for very small chunk sizes
+            # rather than rejecting the request.
+            chunk_overlap = min(settings.CHUNK_OVERLAP, chunk_size // 2)
+        if chunk_overlap >= chunk_size:
+            raise ValueError('chunk_overlap must be smaller than chunk_size')
+        return chunk_size, chunk_overlap
+
+    async def _split_documents(
+        self, documents_in: list[DocumentInput], collection: str,
+    ) -> list[dict[str, Any]]:
+        chunks = []
+        next_chunk_index: dict[str, int] = defaultdict(int)
+        splits = chunking_pool.split_many([
+            (doc.content, *self._chunking_params(doc)) for doc in documents_in
+        ])
+
+        async with aclosing(splits):
+            for doc in documents_in:
+                texts = await anext(splits)
+                # Several inputs may share a source_id; their chunks are
+                # numbered as one continuous document.
+                offset = (
+                    next_chunk_index[doc.source_id]
+                    if doc.source_id is not None else 0
+                )
+                for i, chunk_content in enumerate(texts):
+                    chunks.append({
+                        'content': chunk_content,
+                        'content_hash': content_hash(chunk_content),
+                        'collection': collection,
+                        'source_id': doc.source_id,
+                        'chunk_index': offset + i,
+                        'doc_metadata': doc.metadata or {},
+                        'size': len(chunk_content),
+                    })
+                if doc.source_id is not None:
+                    next_chunk_index[doc.source_id] = offset + len(texts)
+
+        return chunks
+
+    async def _reconcile_source(
+        self,
+        source_id: str,
+        chunks: list[dict[str, Any]],
+        db: AsyncSession,
+        summary: IngestionSummary,
+        collection: str,
+    ) -> list[dict[str, Any]]:
+        # Held until commit, so concurrent uploads of the same source are
+        # reconciled one after the other instead of both inserting.
+        await db.execute(
+            text('SELECT pg_advisory_xact_lock(hashtext(:key))'),
+            {'key': f'{collection}/{source_id}'},
         )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, chunk_overlap=100,
+        result = await db.execute(
+            select(
+                Document.id,
+                Document.content_hash,
+                Document.chunk_index,
+                Document.doc_metadata,
+            ).where(
+                Document.collection == collection,
+                Document.source_id == source_id,
+            ),
+        )
+        existing = defaultdict(list)
+        for row in result.all():
+            existing[row.content_hash].append(row)
+
+        to_insert = []
+        updates = []
+        for chunk in chunks:
+            matches = existing.get(chunk['content_hash'])
+            if not matches:
+                to_insert.append(chunk)
+                continue
+
+            row = matches.pop()
+            if (
+                row.chunk_index == chunk['chunk_index']
+                and row.doc_metadata == chunk['doc_metadata']
+            ):
+                summary.unchanged += 1
+            else:
+                updates.append({
+                    'id': row.id,
+                    'collection': collection,
+                    'chunk_index': chunk['chunk_index'],
+                    'doc_metadata': chunk['doc_metadata'],
+                })
+
+        stale_ids = [row.id for rows in existing.values() for row in rows]
+
+        if updates:
+            await db.execute(update(Document), updates)
+            summary.updated += len(updates)
+        if stale_ids:
+            await db.execute(
+                delete(Document).where(
+                    Document.collection == collection,
+                    Document.id.in_(stale_ids),
+                ),
+            )
+            summary.deleted += len(stale_ids)
+
+        return to_insert
+
+    async def _existing_embeddings(
+        self, hashes: list[str], db: AsyncSession,
+    ) -> dict[str, list[float]]:
+        embeddings = {}
+        for start in range(0, len(hashes), _HASH_LOOKUP_BATCH_SIZE):
+            result = await db.execute(
+                select(Document.content_hash, Document.embedding)
+                .where(
+                    Document.content_hash.in_(
+                        hashes[start:start + _HASH_LOOKUP_BATCH_SIZE],
+                    ),
+                    Document.embedding.is_not(None),
+                )
+                .distinct(Document.content_hash),
+            )
+            embeddings.update({row[0]: row[1] for row in result.all()})
+        return embeddings
+
+    async def _add_chunks(
+        self,
+        db: AsyncSession,
+        chunks: list[dict[str, Any]],
+        embeddings: dict[str, list[float]],
+    ) -> None:
+        await bulk_insert_documents(
+            db,
+            [
+                {**chunk, 'embedding': embeddings[chunk['content_hash']]}
+                for chunk in chunks
+            ],
         )
 
     async def upsert_documents(
-        self, documents_in: list[DocumentInput], db: AsyncSession,
-    ) -> list[UUID]:
-        all_chunks_text = []
-        all_metadata = []
-
-        for doc in documents_in:
-            chunks = self.text_splitter.split_text(doc.content)
-            for chunk_content in chunks:
-                all_chunks_text.append(chunk_content)
-                all_metadata.append(doc.metadata or {})
-
-        if not all_chunks_text:
-            return []
-
-        embeddings = self.embedding_model.embed_documents(all_chunks_text)
-
-        new_docs_to_add = [
-            Document(content=text, embedding=embedding, doc_metadata=meta)
-            for text, embedding, meta in zip(
-                all_chunks_text,
-                embeddings,
-                all_metadata,
+        self,
+        documents_in: list[DocumentInput],
+        db: AsyncSession,
+        progress: ProgressCallback | None = None,
+        collection: str = DEFAULT_COLLECTION,
+    ) -> IngestionSummary:
+        start_time = time.perf_counter()
+        summary = IngestionSummary()
+
+        async def report(stage: str, count: int) -> None:
+            if progress is not None and count:
+                await progress(stage, count)
+
+        chunks = await self._split_documents(documents_in, collection)
+        await report('split', len(chunks))
+        chunks_by_source = defaultdict(list)
+        for chunk in chunks:
+            chunks_by_source[chunk['source_id']].append(chunk)
+
+        # Inputs without a source_id cannot be matched against earlier
+        # uploads, so they are always appended.
+        to_insert = chunks_by_source.pop(None, [])
+        # Sorted, so source locks are always taken in the same order.
+        for source_id, chunks in sorted(chunks_by_source.items()):
+            to_insert.extend(
+                await self._reconcile_source(
+                    source_id, chunks, db, summary, collection,
+                ),
             )
+
+        chunks_by_hash = defaultdict(list)
+        for chunk in to_insert:
+            chunks_by_hash[chunk['content_hash']].append(chunk)
+
+        reused = await self._existing_embeddings(list(chunks_by_hash), db)
+        reused_chunks = [
+            chunk for h, chunks in chunks_by_hash.items() if h in reused
+            for chunk in chunks
         ]
+        await self._add_chunks(db, reused_chunks, reused)
+        summary.reused_embeddings = len(reused_chunks)
+        await report('stored', len(reused_chunks))
 
-        db.add_all(new_docs_to_add)
+        missing_hashes = [h for h in chunks_by_hash if h not in reused]
+        # aclosing cancels the in-flight embedding batches right away if the
+        # upsert is aborted part way through.
+        async with aclosing(
+            embed_in_batches(
+                self.embedding_model,
+                [chunks_by_hash[h][0]['content'] for h in missing_hashes],
+            ),
+        ) as batches:
+            async for start, embeddings in batches:
+                batch_hashes = missing_hashes[start:start + len(embeddings)]
+                batch_chunks = [
+                    chunk for h in batch_hashes for chunk in chunks_by_hash[h]
+                ]
+                await report('embedded', len(embeddings))
+                await self._add_chunks(
+                    db, batch_chunks, dict(zip(batch_hashes, embeddings)),
+                )
+                summary.embedded += len(embeddings)
+                await report('stored', len(batch_chunks))
+
+        summary.inserted = len(to_insert)
+        if summary.changed:
+            await semantic_cache.invalidate(db, collection)
         await db.commit()
+        if summary.inserted:
+            try:
+                await build_deferred_index(async_engine, collection)
+            except Exception:
+                # The rows are committed; retrieval falls back to a scan
+                # and the rebuild endpoint can create the index later.
+                logger.exception(
+                    'Building the vector index failed',
+                    extra={'collection': collection},
+                )
+
+        elapsed = time.perf_counter() - start_time
+        INGESTION_SECONDS.observe(elapsed)
+        for outcome, count in summary.model_dump().items():
+            INGESTION_CHUNKS.labels(outcome).inc(count)
+        logger.info(
+            'Knowledge base upsert finished',
+            extra={**summary.model_dump(), 'elapsed_ms': elapsed * 1000},
+        )
 
-        return [doc.id for doc in new_docs_to_add]
+        return summary
 
-    async def delete_document(self, doc_id: UUID, db: AsyncSession) -> bool:
+    async def delete_document(
+        self,
+        doc_id: UUID,
+        db: AsyncSession,
+        collection: str = DEFAULT_COLLECTION,
+    ) -> bool:
         result = await db.execute(
             delete(Document).
-            where(Document.id == doc_id),
+            where(Document.collection == collection, Document.id == doc_id),
         )
+        if result.rowcount > 0:
+            await semantic_cache.invalidate(db, collection)
         await db.commit()
         return result.rowcount > 0
 
     async def list_documents(
         self,
         db: AsyncSession,
-    ) -> list[DocumentMetadataOutput]:
-        result = await db.execute(select(Document))
-        documents = result.scalars().all()
-
-        return [
-            DocumentMetadataOutput(
-                id=doc.id,
-                size=len(doc.content),
-                created_at=doc.created_at,
-                doc_metadata=doc.doc_metadata,
+        limit: int = 100,
+        cursor: str | None = None,
+        source_id: str | None = None,
+        collection: str = DEFAULT_COLLECTION,
+    ) -> DocumentListPage:
+        # Only metadata columns are selected; content and embeddings never
+        # leave the database for a listing.
+        stmt = (
+            select(
+                Document.id,
+                Document.size,
+                Document.created_at,
+                Document.doc_metadata,
+                Document.source_id,
+                Document.chunk_index,
+            )
+            .where(Document.collection == collection)
+            .order_by(Document.created_at, Document.id)
+            .limit(limit + 1)
+        )
+        if source_id is not None:
+            stmt = stmt.where(Document.source_id == source_id)
+        if cursor is not None:
+            created_at, doc_id = decode_cursor(cursor)
+            stmt = stmt.where(
+                tuple_(Document.created_at, Document.id)
+                > tuple_(created_at, doc_id),
             )
-            for doc in documents
-        ]
 
-    async def delete_all_documents(self, db: AsyncSession) -> int:
-        result = await db.execute(delete(Document))
-        await db.commit()
-        return result.rowcount
+        rows = (await db.execute(stmt)).mappings().all()
+        items = [DocumentMetadataOutput(**row) for row in rows[:limit]]
+        next_cursor = (
+            encode_cursor(items[-1].created_at, items[-1].id)
+            if len(rows) > limit else None
+        )
+        return DocumentListPage(items=items, next_cursor=next_cursor)
+
+    async def summarize_sources(
+        self, db: AsyncSession, collection: str = DEFAULT_COLLECTION,
+    ) -> list[SourceSummary]:
+        result = await db.execute(
+            select(
+                Document.source_id,
+                func.count().label('chunk_count'),
+                func.coalesce(func.sum(Document.size), 0).label('total_size'),
+                func.max(Document.created_at).label('last_updated'),
+            )
+            .where(Document.collection == collection)
+            .group_by(Document.source_id)
+            .order_by(Document.source_id),
+        )
+        return [SourceSummary(**row) for row in result.mappings().all()]
 
 
 knowledge_service = KnowledgeService()
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from uuid import UUID
+
+from langchain_core.messages import HumanMessage
+from langchain_core.messages import SystemMessage
+from sqlalchemy import delete
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import settings
+from app.core.tokens import estimate_tokens
+from app.db import AsyncSessionLocal
+from app.db import ChatSession
+from app.db import ChatTurn
+from app.providers import create_chat_model
+
+logger = logging.getLogger(__name__)
+
+_SUMMARY_PROMPT = """Update the running summary of a conversation between a
+user and an AI assistant with the new turns below. Keep facts, names,
+decisions and open questions the assistant may need later; drop small talk.
+Answer with the updated summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+"""
+
+
+def recent_turn_count(token_counts: list[int], budget: int) -> int:
+    # Number of newest turns that fit in the budget, never fewer than
+    # HISTORY_MIN_RECENT_TURNS so the last exchange is always verbatim.
+    min_turns = settings.HISTORY_MIN_RECENT_TURNS
+    kept = 0
+    used = 0
+    for tokens in reversed(token_counts):
+        if kept >= min_turns and used + tokens > budget:
+            break
+        kept += 1
+        used += tokens
+    return kept
+
+
+def trim_history(
+    history: list[dict[str, str]], budget: int,
+) -> list[dict[str, str]]:
+    # Client-sent history is trimmed by whole turns, a user message with
+    # the replies that follow it, using the same rule as stored sessions.
+    turns: list[list[dict[str, str]]] = []
+    for message in history:
+        if not turns or message.get('role') == 'user':
+            turns.append([])
+        turns[-1].append(message)
+    kept = recent_turn_count(
+        [
+            sum(
+                estimate_tokens(message.get('content', ''))
+                for message in turn
+            )
+            for turn in turns
+        ],
+        budget,
+    )
+    return [message for turn in turns[len(turns) - kept:] for message in turn]
+
+
+class SessionService:
+
+    def __init__(self):
+        self.llm = create_chat_model()
+        self._compacting: set[UUID] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def create_session(self, db: AsyncSession) -> ChatSession:
+        session = ChatSession()
+        db.add(session)
+        await db.commit()
+        return session
+
+    async def get_session(
+        self, db: AsyncSession, session_id: UUID,
+    ) -> ChatSession | None:
+        return await db.get(ChatSession, session_id)
+
+    async def list_turns(
+        self, db: AsyncSession, session_id: UUID, start: int = 0,
+    ) -> list[ChatTurn]:
+        result = await db.execute(
+            select(ChatTurn)
+            .where(
+                ChatTurn.session_id == session_id,
+                ChatTurn.turn_index >= start,
+            )
+            .order_by(ChatTurn.turn_index),
+        )
+        return list(result.scalars().all())
+
+    async def delete_session(self, db: AsyncSession, session_id: UUID) -> bool:
+        result = await db.execute(
+            delete(ChatSession).where(ChatSession.id == session_id),
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    async def load_context(
+        self, db: AsyncSession, session_id: UUID,
+    ) -> tuple[str | None, list[dict[str, str]]]:
+        # Only turns not yet folded into the summary are read, and of those
+        # only the newest that fit the token budget are sent verbatim. Turns
+        # that fell out of the window but are not summarized yet are left
+        # out until the background compaction catches up.
+        session = await self.get_session(db, session_id)
+        if session is None:
+            return None, []
+
+        turns = await self.list_turns(db, session_id, session.summarized_turns)
+        kept = recent_turn_count(
+            [turn.token_count for turn in turns],
+            settings.HISTORY_TOKEN_BUDGET,
+        )
+        history = []
+        for turn in turns[len(turns) - kept:]:
+            history.append({'role': 'user', 'content': turn.question})
+            history.append({'role': 'assistant', 'content': turn.response})
+        return session.summary, history
+
+    async def append_turn(
+        self,
+        db: AsyncSession,
+        session_id: UUID,
+        question: str,
+        response: str,
+    ) -> None:
+        # Incrementing the counter row-locks the session, so concurrent
+        # requests on the same session get consecutive turn indexes.
+        result = await db.execute(
+            update(ChatSession)
+            .where(ChatSession.id == session_id)
+            .values(
+                turn_count=ChatSession.turn_count + 1,
+                updated_at=datetime.utcnow(),
+            )
+            .returning(ChatSession.turn_count),
+        )
+        turn_count = result.scalar_one_or_none()
+        if turn_count is None:
+            await db.rollback()
+            return
+
+        db.add(
+            ChatTurn(
+                session_id=session_id,
+                turn_index=turn_count - 1,
+                question=question,
+                response=response,
+                token_count=(
+                    estimate_tokens(question) + estimate_tokens(response)
+                ),
+            ),
+        )
+        await db.commit()
+        self.schedule_compaction(session_id)
+
+    def schedule_compaction(self, session_id: UUID) -> None:
+        # Summarizing costs an LLM call, so it runs between turns instead of
+        # on the request path; the next question uses whatever summary is
+        # ready by then.
+        if session_id in self._compacting:
+            return
+        self._compacting.add(session_id)
+        task = asyncio.create_task(self._compact(session_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compact(self, session_id: UUID) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await self._fold_old_turns(db, session_id)
+        except Exception:
+            logger.exception(
+                'Session compaction failed',
+                extra={'session_id': str(session_id)},
+            )
+        finally:
+            self._compacting.discard(session_id)
+
+    async def _fold_old_turns(
+        self, db: AsyncSession, session_id: UUID,
+    ) -> None:
+        session = await self.get_session(db, session_id)
+        if session is None:
+            return
+
+        turns = await self.list_turns(db, session_id, session.summarized_turns)
+        kept = recent_turn_count(
+            [turn.token_count for turn in turns],
+            settings.HISTORY_TOKEN_BUDGET,
+        )
+        to_fold = turns[:len(turns) - kept]
+        if not to_fold:
+            return
+
+        summary = await self._summarize(session.summary, to_fold)
+        await db.execute(
+            update(ChatSession)
+            .where(
+                ChatSession.id == session_id,
+                ChatSession.summarized_turns == session.summarized_turns,
+            )
+            .values(
+                summary=summary,
+                summarized_turns=to_fold[-1].turn_index + 1,
+            ),
+        )
+        await db.commit()
+        logger.debug(
+            'Folded %d turns into the session summary', len(to_fold),
+            extra={'session_id': str(session_id)},
+        )
+
+    async def _summarize(
+        self, summary: str | None, turns: list[ChatTurn],
+    ) -> str:
+        prompt = _SUMMARY_PROMPT.format(
+            max_words=settings.SESSION_SUMMARY_MAX_WORDS,
+            summary=summary or '(none)',
+            turns='\n\n'.join(
+                f'User: {turn.question}\nAssistant: {turn.response}'
+                for turn in turns
+            ),
+        )
+        result = await self.llm.ainvoke([
+            SystemMessage(content='You summarize conversations.'),
+            HumanMessage(content=prompt),
+        ])
+        return result.content
+
+    async def wait_for_compactions(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+session_service = SessionService()
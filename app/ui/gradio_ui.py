@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import os
 
 import gradio as gr
 import httpx
@@ -8,23 +10,27 @@ import httpx
 from app.core import settings
 
 API_URL = settings.API_URL
+KNOWLEDGE_PAGE_SIZE = 50
+JOB_POLL_INTERVAL_SECONDS = 1.0
 
 
 async def handle_chat_interaction(
         message: str,
         history_tuples: list[tuple[str, str]],
+        session_id: str | None,
 ):
-    history_for_api = []
-    for user_msg, assistant_msg in history_tuples:
-        history_for_api.append({'role': 'user', 'content': user_msg})
-        history_for_api.append({'role': 'assistant', 'content': assistant_msg})
-
-    payload = {'question': message, 'history': history_for_api}
-
+    # The conversation lives in a server-side session, so only the new
+    # question is sent on each turn.
     history_tuples.append([message, ''])
 
     try:
         async with httpx.AsyncClient(timeout=None) as client:
+            if session_id is None:
+                response = await client.post(f'{API_URL}/chat/sessions')
+                response.raise_for_status()
+                session_id = response.json()['session_id']
+
+            payload = {'question': message, 'session_id': session_id}
             async with client.stream(
                 'POST', f'{API_URL}/chat', json=payload,
             ) as response:
@@ -33,60 +39,167 @@ async def handle_chat_interaction(
                 async for chunk in response.aiter_text():
                     if not chunk:
                         continue
-                    for char in chunk:
-                        history_tuples[-1][1] += char
-                        await asyncio.sleep(0.005)
-                        yield history_tuples
+                    history_tuples[-1][1] += chunk
+                    yield history_tuples, session_id
 
     except Exception as e:
         history_tuples[-1][1] = f'Error: {str(e)}'
-        yield history_tuples
+        yield history_tuples, session_id
+
+
+def format_job_status(job: dict) -> str:
+    text = (
+        f"Job {job['id']}: {job['status']} - "
+        f"{job['chunks_split']} chunks split, "
+        f"{job['chunks_embedded']} embedded, "
+        f"{job['chunks_stored']} stored"
+    )
+    if job.get('summary'):
+        summary = job['summary']
+        text += (
+            f" ({summary['inserted']} inserted, "
+            f"{summary['unchanged']} unchanged, "
+            f"{summary.get('updated', 0)} updated, "
+            f"{summary['deleted']} removed)"
+        )
+    if job.get('error'):
+        text += f"\nError: {job['error']}"
+    return text
 
 
 async def handle_file_upload(file):
+    # The file is streamed to the API as multipart form data; ingestion runs
+    # as a background job whose progress is polled and shown here.
     if not file:
-        return 'Please upload a file.'
+        yield 'Please upload a file.', None
+        return
+
+    filename = os.path.basename(file.name)
+    async with httpx.AsyncClient(timeout=None) as client:
+        with open(file.name, 'rb') as f:
+            response = await client.post(
+                f'{API_URL}/knowledge/upload',
+                files={'file': (filename, f, 'text/plain')},
+                data={
+                    'source_id': filename,
+                    'metadata': json.dumps({'source': filename}),
+                },
+            )
+        if response.status_code != 202:
+            yield f'Error: {response.status_code} - {response.text}', None
+            return
+
+        job = response.json()
+        while True:
+            yield format_job_status(job), job['id']
+            if job['status'] in ('succeeded', 'failed', 'cancelled'):
+                return
+            await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+            response = await client.get(
+                f"{API_URL}/knowledge/jobs/{job['id']}",
+            )
+            if response.status_code != 200:
+                yield f'Error: {response.status_code} - {response.text}', None
+                return
+            job = response.json()
 
-    with open(file.name, encoding='utf-8') as f:
-        content = f.read()
 
-    payload = {
-        'documents': [
-            {'content': content, 'metadata': {'source': file.name}},
-        ],
-    }
+async def cancel_upload(job_id: str | None):
+    if not job_id:
+        return 'No upload in progress.'
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with httpx.AsyncClient() as client:
         response = await client.post(
-            f'{API_URL}/knowledge/update',
-            json=payload,
+            f'{API_URL}/knowledge/jobs/{job_id}/cancel',
         )
 
-    if response.status_code == 201:
-        return f"Successfully uploaded file '{file.name}'!"
-    else:
-        return f'Error: {response.status_code} - {response.text}'
+    if response.status_code == 200:
+        return format_job_status(response.json())
+    return f'Error: {response.status_code} - {response.text}'
+
 
+async def fetch_knowledge_page(cursor: str | None, source_id: str):
+    params = {'limit': KNOWLEDGE_PAGE_SIZE}
+    if cursor:
+        params['cursor'] = cursor
+    if source_id and source_id.strip():
+        params['source_id'] = source_id.strip()
 
-async def get_knowledge_list():
     async with httpx.AsyncClient() as client:
-        response = await client.get(f'{API_URL}/knowledge')
+        response = await client.get(f'{API_URL}/knowledge', params=params)
+
+    if response.status_code != 200:
+        return f'Error fetching document list: {response.text}', None
+
+    page = response.json()
+    docs = page['items']
+    if not docs:
+        return 'No documents found in the knowledge base.', None
+
+    markdown_output = (
+        '| ID | Size (bytes) | Source | Chunk |\n|---|---|---|---|\n'
+    )
+    for doc in docs:
+        source = doc.get('source_id') or (
+            doc.get('doc_metadata') or {}
+        ).get('source', 'N/A')
+        markdown_output += (
+            f"| `{doc['id']}` | {doc['size']} | {source} "
+            f"| {doc.get('chunk_index', '')} |\n"
+        )
+    return markdown_output, page['next_cursor']
 
-    if response.status_code == 200:
-        docs = response.json()
-        if not docs:
-            return 'No documents found in the knowledge base.'
 
-        markdown_output = (
-            '| ID | Size (bytes) | Source Metadata |\n|---|---|---|\n'
+async def get_knowledge_list(source_id: str = ''):
+    markdown_output, next_cursor = await fetch_knowledge_page(None, source_id)
+    return markdown_output, [None], next_cursor
+
+
+async def get_next_knowledge_page(
+    cursors: list[str | None], next_cursor: str | None, source_id: str,
+):
+    if not next_cursor:
+        return gr.update(), cursors, next_cursor
+
+    markdown_output, new_next_cursor = await fetch_knowledge_page(
+        next_cursor, source_id,
+    )
+    return markdown_output, cursors + [next_cursor], new_next_cursor
+
+
+async def get_previous_knowledge_page(
+    cursors: list[str | None], next_cursor: str | None, source_id: str,
+):
+    if len(cursors) <= 1:
+        return gr.update(), cursors, next_cursor
+
+    cursors = cursors[:-1]
+    markdown_output, next_cursor = await fetch_knowledge_page(
+        cursors[-1], source_id,
+    )
+    return markdown_output, cursors, next_cursor
+
+
+async def get_source_summary():
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f'{API_URL}/knowledge/sources')
+
+    if response.status_code != 200:
+        return f'Error fetching source summary: {response.text}'
+
+    sources = response.json()
+    if not sources:
+        return 'No documents found in the knowledge base.'
+
+    markdown_output = (
+        '| Source | Chunks | Total size | Last updated |\n|---|---|---|---|\n'
+    )
+    for source in sources:
+        markdown_output += (
+            f"| {source['source_id'] or 'N/A'} | {source['chunk_count']} "
+            f"| {source['total_size']} | {source['last_updated']} |\n"
         )
-        for doc in docs:
-            source = doc.get('doc_metadata', {}).get('source', 'N/A')
-            markdown_output += f"| `{doc['id']}` \
-            | {doc['size']} | {source} |\n"
-        return markdown_output
-    else:
-        return f'Error fetching document list: {response.text}'
+    return markdown_output
 
 
 async def handle_delete_knowledge(doc_id: str):
@@ -140,13 +253,14 @@ def create_ui():
                     label='Conversation', height=600, bubble_full_width=False,
                 )
                 msg = gr.Textbox(label='Enter your question here')
+                session_state = gr.State(None)
                 clear = gr.ClearButton([msg, chatbot])
-                print(clear)
+                clear.click(lambda: None, None, session_state, queue=False)
 
                 msg.submit(
                     handle_chat_interaction,
-                    [msg, chatbot],
-                    chatbot,
+                    [msg, chatbot, session_state],
+                    [chatbot, session_state],
                 ).then(
                     lambda: gr.update(value=''),
                     None,
@@ -161,14 +275,22 @@ def create_ui():
                         file_input = gr.File(
                             label='Upload .txt file', file_types=['.txt'],
                         )
-                        upload_button = gr.Button('Upload Document')
+                        with gr.Row():
+                            upload_button = gr.Button('Upload Document')
+                            cancel_button = gr.Button('Cancel Upload')
                         upload_status = gr.Textbox(
                             label='Upload Status', interactive=False,
                         )
+                        upload_job_id = gr.State(None)
 
                         upload_button.click(
                             handle_file_upload,
                             inputs=file_input,
+                            outputs=[upload_status, upload_job_id],
+                        )
+                        cancel_button.click(
+                            cancel_upload,
+                            inputs=upload_job_id,
                             outputs=upload_status,
                         )
 
@@ -191,27 +313,71 @@ def create_ui():
                         )
 
                     with gr.Column(scale=2):
+                        gr.Markdown('## Sources')
+                        refresh_sources_button = gr.Button('Refresh Sources')
+                        sources_display = gr.Markdown()
+
                         gr.Markdown('## Existing Document List')
-                        refresh_button = gr.Button('Refresh List')
+                        source_filter = gr.Textbox(
+                            label='Filter by source ID (optional)',
+                        )
+                        with gr.Row():
+                            prev_button = gr.Button('Previous Page')
+                            refresh_button = gr.Button('Refresh List')
+                            next_button = gr.Button('Next Page')
                         knowledge_display = gr.Markdown()
+                        page_cursors = gr.State([None])
+                        next_page_cursor = gr.State(None)
+
+                page_outputs = [
+                    knowledge_display, page_cursors, next_page_cursor,
+                ]
+                page_inputs = [page_cursors, next_page_cursor, source_filter]
+
+                refresh_sources_button.click(
+                    get_source_summary,
+                    outputs=sources_display,
+                )
 
                 refresh_button.click(
                     get_knowledge_list,
-                    outputs=knowledge_display,
+                    inputs=source_filter,
+                    outputs=page_outputs,
+                )
+                source_filter.submit(
+                    get_knowledge_list,
+                    inputs=source_filter,
+                    outputs=page_outputs,
+                )
+                next_button.click(
+                    get_next_knowledge_page,
+                    inputs=page_inputs,
+                    outputs=page_outputs,
+                )
+                prev_button.click(
+                    get_previous_knowledge_page,
+                    inputs=page_inputs,
+                    outputs=page_outputs,
                 )
 
                 delete_button.click(
                     handle_delete_knowledge,
                     inputs=doc_id_to_delete,
                     outputs=delete_status,
-                ).then(get_knowledge_list, None, outputs=knowledge_display)
+                ).then(
+                    get_knowledge_list,
+                    inputs=source_filter,
+                    outputs=page_outputs,
+                )
 
                 delete_all_button.click(
                     handle_delete_all_knowledge,
                     inputs=None,
                     outputs=delete_all_status,
                 ).then(
-                    get_knowledge_list, None, outputs=knowledge_display,
+                    get_knowledge_list,
+                    inputs=source_filter,
+                    outputs=page_outputs,
                 )
 
     return demo
@@ -0,0 +1,103 @@
+# Compares document chunk insert throughput of the ORM add_all path with the
+# batched executemany and COPY paths of app.db.bulk_insert_documents.
+#
+#   python -m benchmarks.bench_bulk_insert --rows 5000
+#
+# Every run happens inside a transaction that is rolled back, so the target
+# database is left untouched. --without-vector-index drops the ANN index
+# inside that transaction to isolate the raw write path from HNSW/IVFFlat
+# maintenance cost.
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import text
+
+from app.db import AsyncSessionLocal
+from app.db import bulk_insert_documents
+from app.db import DEFAULT_COLLECTION
+from app.db import Document
+from app.db.partitions import partition_name
+from app.db.session import create_tables_on_startup
+from app.db.vector_index import partition_index_name
+
+VECTOR_INDEX_NAME = partition_index_name(partition_name(DEFAULT_COLLECTION))
+
+
+def make_rows(count: int) -> list[dict]:
+    return [
+        {
+            'collection': DEFAULT_COLLECTION,
+            'content': f'Benchmark chunk {i} ' * 50,
+            'embedding': [random.random() for _ in range(768)],
+            'doc_metadata': {'source': 'benchmark'},
+            'source_id': 'benchmark',
+            'chunk_index': i,
+            'content_hash': f'{i:064x}',
+        }
+        for i in range(count)
+    ]
+
+
+async def insert_orm(db, rows: list[dict], batch_size: int) -> None:
+    db.add_all([Document(**row) for row in rows])
+    await db.flush()
+
+
+async def insert_executemany(db, rows: list[dict], batch_size: int) -> None:
+    await bulk_insert_documents(
+        db, rows, batch_size=batch_size, method='executemany',
+    )
+
+
+async def insert_copy(db, rows: list[dict], batch_size: int) -> None:
+    await bulk_insert_documents(db, rows, batch_size=batch_size, method='copy')
+
+
+async def run(
+    name: str,
+    insert,
+    rows: list[dict],
+    batch_size: int,
+    without_vector_index: bool,
+) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.connection()
+        if without_vector_index:
+            await db.execute(text(f'DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}'))
+        start = time.perf_counter()
+        await insert(db, rows, batch_size)
+        elapsed = time.perf_counter() - start
+        await db.rollback()
+
+    print(
+        f'{name:<12} {len(rows):>8} rows {elapsed:>8.2f}s '
+        f'{len(rows) / elapsed:>10.0f} rows/s',
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--without-vector-index', action='store_true')
+    args = parser.parse_args()
+
+    await create_tables_on_startup()
+    rows = make_rows(args.rows)
+
+    for name, insert in [
+        ('orm', insert_orm),
+        ('executemany', insert_executemany),
+        ('copy', insert_copy),
+    ]:
+        await run(
+            name, insert, rows, args.batch_size, args.without_vector_index,
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
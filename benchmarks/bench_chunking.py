@@ -0,0 +1,85 @@
+# Measures chunking throughput on a large synthetic corpus: the previous
+# single-threaded path (every document split in turn on the calling thread)
+# against the process pool used by ingestion. Documents are built by
+# replicating sample_doc.txt, so they are large enough to be sent to the
+# pool rather than split inline.
+#
+#   python -m benchmarks.bench_chunking --documents 64 --copies 20 --workers 4
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from app.core.chunking import ChunkingPool
+from app.core.chunking import split_text
+
+
+def single_threaded(documents) -> int:
+    return sum(len(split_text(*doc)) for doc in documents)
+
+
+async def pooled(pool: ChunkingPool, documents) -> int:
+    return sum([len(texts) async for texts in pool.split_many(documents)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', default='sample_doc.txt')
+    parser.add_argument('--documents', type=int, default=64)
+    parser.add_argument(
+        '--copies', type=int, default=20,
+        help='times the corpus is repeated inside each document',
+    )
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--chunk-overlap', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding='utf-8') as f:
+        corpus = f.read()
+    documents = [
+        (
+            f'Document {i}\n\n' + '\n\n'.join([corpus] * args.copies),
+            args.chunk_size,
+            args.chunk_overlap,
+        )
+        for i in range(args.documents)
+    ]
+    total_chars = sum(len(doc[0]) for doc in documents)
+    print(
+        f'{len(documents)} documents, {total_chars / 1e6:.1f}M chars, '
+        f'{os.cpu_count()} CPUs',
+    )
+
+    start = time.perf_counter()
+    chunks = single_threaded(documents)
+    elapsed = time.perf_counter() - start
+    print(
+        f'single-threaded: {chunks} chunks in {elapsed:6.2f}s '
+        f'({chunks / elapsed:10.0f} chunks/s)',
+    )
+
+    pool = ChunkingPool(workers=args.workers, inline_max_chars=0)
+    try:
+        # The first call pays for spawning the workers; it is timed
+        # separately so the steady-state figure matches a running server.
+        start = time.perf_counter()
+        asyncio.run(pooled(pool, documents[:1]))
+        print(f'pool start-up:   {time.perf_counter() - start:6.2f}s')
+
+        start = time.perf_counter()
+        chunks = asyncio.run(pooled(pool, documents))
+        pooled_elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+    print(
+        f'process pool:    {chunks} chunks in {pooled_elapsed:6.2f}s '
+        f'({chunks / pooled_elapsed:10.0f} chunks/s, '
+        f'{elapsed / pooled_elapsed:.2f}x)',
+    )
+
+
+if __name__ == '__main__':
+    main()
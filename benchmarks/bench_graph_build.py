@@ -0,0 +1,38 @@
+# Measures the per-request cost of building and compiling the chat graph
+# (what every /chat request paid before the graph was cached) against
+# fetching the process-wide compiled graph.
+#
+#   python -m benchmarks.bench_graph_build --iterations 500
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.graph import build_graph
+from app.graph import get_graph_runnable
+
+
+def measure(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    get_graph_runnable()
+
+    rebuilt = measure(build_graph, args.iterations)
+    cached = measure(get_graph_runnable, args.iterations)
+
+    print(f'build + compile per request: {rebuilt:>10.1f} us')
+    print(f'cached compiled graph:       {cached:>10.1f} us')
+    print(f'saved per request:           {rebuilt - cached:>10.1f} us')
+
+
+if __name__ == '__main__':
+    main()
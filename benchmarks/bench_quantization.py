@@ -0,0 +1,200 @@
+# Compares the VECTOR_STORAGE modes on the documents of one collection
+# stored in DATABASE_URL. For each mode a scratch ANN index is built on the
+# collection's partition next to the live one, then sampled queries report
+# index size, build time, latency and recall@k against an exact
+# (index-free) scan. The scratch indexes are dropped afterwards. halfvec
+# and bit need pgvector 0.7 or newer.
+#
+#   python -m benchmarks.bench_quantization --queries 100 --top-k 10
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core import settings
+from app.db import async_engine
+from app.db import AsyncSessionLocal
+from app.db import apply_search_params
+from app.db import DEFAULT_COLLECTION
+from app.db.partitions import partition_name
+from app.db.vector_index import EMBEDDING_DIMENSIONS
+from app.db.vector_index import vector_index_ddl
+from app.graph.retrieval import _nearest_sql
+from benchmarks.bench_retrieval import percentile
+from benchmarks.bench_retrieval import sample_queries
+
+COMPACT_MODES = ('halfvec', 'bit')
+
+
+async def pgvector_version() -> tuple[int, ...]:
+    async with AsyncSessionLocal() as db:
+        version = (
+            await db.execute(
+                text(
+                    "SELECT extversion FROM pg_extension "
+                    "WHERE extname = 'vector'",
+                ),
+            )
+        ).scalar_one()
+    return tuple(int(part) for part in version.split('.'))
+
+
+async def storage_sizes(
+    modes: list[str], collection: str,
+) -> dict[str, float]:
+    expressions = {
+        'vector': 'embedding',
+        'halfvec': f'embedding::halfvec({EMBEDDING_DIMENSIONS})',
+        'bit': 'binary_quantize(embedding)',
+    }
+    columns = ', '.join(
+        f'avg(pg_column_size({expressions[mode]})) AS {mode}'
+        for mode in modes
+    )
+    async with AsyncSessionLocal() as db:
+        row = (
+            await db.execute(
+                text(
+                    f'SELECT {columns} FROM documents '
+                    f'WHERE collection = :collection '
+                    f'AND embedding IS NOT NULL',
+                ),
+                {'collection': collection},
+            )
+        ).mappings().one()
+    return {mode: float(row[mode] or 0) for mode in modes}
+
+
+async def search(
+    queries, top_k: int, exact: bool, collection: str,
+) -> tuple[list[set], list[float]]:
+    results = []
+    latencies = []
+    async with AsyncSessionLocal() as db:
+        for _, embedding in queries:
+            start = time.perf_counter()
+            if exact:
+                await db.execute(text('SET LOCAL enable_indexscan = off'))
+            else:
+                await apply_search_params(db)
+            result = await db.execute(
+                text(_nearest_sql(False)),
+                {
+                    'query_embedding': str(embedding),
+                    'collection': collection,
+                    'candidates': top_k,
+                    'rerank_candidates': settings.VECTOR_RERANK_CANDIDATES,
+                },
+            )
+            results.append({row.id for row in result})
+            await db.rollback()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return results, latencies
+
+
+async def build_index(
+    mode: str, collection: str,
+) -> tuple[str, float, int]:
+    index_name = f'bench_{mode}_embedding_idx'
+    partition = partition_name(collection)
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        await conn.execute(text(f'DROP INDEX IF EXISTS {index_name}'))
+        start = time.perf_counter()
+        await conn.execute(text(vector_index_ddl(index_name, partition)))
+        elapsed = time.perf_counter() - start
+        size = (
+            await conn.execute(
+                text('SELECT pg_relation_size(CAST(:name AS regclass))'),
+                {'name': index_name},
+            )
+        ).scalar_one()
+    return index_name, elapsed, size
+
+
+async def drop_index(index_name: str) -> None:
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        await conn.execute(text(f'DROP INDEX IF EXISTS {index_name}'))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--modes', default='vector,halfvec,bit')
+    parser.add_argument('--collection', default=DEFAULT_COLLECTION)
+    parser.add_argument(
+        '--rerank-candidates', type=int,
+        default=settings.VECTOR_RERANK_CANDIDATES,
+    )
+    args = parser.parse_args()
+
+    if settings.VECTOR_INDEX_TYPE == 'none':
+        print('VECTOR_INDEX_TYPE is none; nothing to compare.')
+        return
+
+    modes = [mode.strip() for mode in args.modes.split(',')]
+    version = await pgvector_version()
+    if version < (0, 7):
+        skipped = [mode for mode in modes if mode in COMPACT_MODES]
+        modes = [mode for mode in modes if mode not in COMPACT_MODES]
+        if skipped:
+            print(
+                f'pgvector {".".join(map(str, version))} has no halfvec/bit '
+                f'support; skipping {", ".join(skipped)}',
+            )
+
+    queries = await sample_queries(args.queries, args.collection)
+    if not queries:
+        print(
+            f'No documents with embeddings in {args.collection!r}; '
+            'ingest some first.',
+        )
+        return
+
+    settings.VECTOR_RERANK_CANDIDATES = args.rerank_candidates
+    settings.VECTOR_STORAGE = 'vector'
+    truth, _ = await search(
+        queries, args.top_k, exact=True, collection=args.collection,
+    )
+    sizes = await storage_sizes(modes, args.collection)
+
+    for mode in modes:
+        settings.VECTOR_STORAGE = mode
+        index_name, build_seconds, index_size = await build_index(
+            mode, args.collection,
+        )
+        try:
+            print(
+                f'{mode:<8} bytes/embedding={sizes[mode]:7.0f} '
+                f'index={index_size / 1024 / 1024:8.2f}MB '
+                f'build={build_seconds:6.2f}s',
+            )
+            # Warm the new index before timing it.
+            await search(
+                queries[:10], args.top_k, exact=False,
+                collection=args.collection,
+            )
+            found, latencies = await search(
+                queries, args.top_k, exact=False, collection=args.collection,
+            )
+            recall = statistics.mean(
+                len(hits & expected) / max(len(expected), 1)
+                for hits, expected in zip(found, truth)
+            )
+            print(
+                f'{"":<8} p50={percentile(latencies, 0.50):7.2f}ms '
+                f'p95={percentile(latencies, 0.95):7.2f}ms '
+                f'recall@{args.top_k}={recall:.3f}',
+            )
+        finally:
+            await drop_index(index_name)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
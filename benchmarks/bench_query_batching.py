@@ -0,0 +1,83 @@
+# Compares per-query embedding calls with the micro-batcher used by the
+# chat graph. The provider is simulated: every call takes --latency-ms and
+# at most --provider-concurrency calls run at once, standing in for a rate
+# limit. --concurrency queries are issued together, --rounds times, and
+# the run reports provider calls and per-query latency for both modes.
+#
+#   python -m benchmarks.bench_query_batching --concurrency 64 --rounds 20
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from app.providers import BatchedQueryEmbeddings
+from app.providers import HashEmbeddings
+from benchmarks.bench_retrieval import percentile
+
+
+class SimulatedProvider(HashEmbeddings):
+
+    def __init__(self, latency_ms: float, concurrency: int):
+        super().__init__(dimensions=8)
+        self.delay = latency_ms / 1000
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.calls = 0
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        async with self.semaphore:
+            self.calls += 1
+            await asyncio.sleep(self.delay)
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+async def run(name: str, embeddings, provider, args) -> None:
+    latencies = []
+
+    async def query(text: str) -> None:
+        start = time.perf_counter()
+        await embeddings.aembed_query(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for round_index in range(args.rounds):
+        await asyncio.gather(*[
+            query(f'question {round_index} {i}')
+            for i in range(args.concurrency)
+        ])
+    elapsed = time.perf_counter() - start
+    print(
+        f'{name:<10} calls={provider.calls:6d} '
+        f'p50={percentile(latencies, 0.50):8.1f}ms '
+        f'p95={percentile(latencies, 0.95):8.1f}ms '
+        f'throughput={len(latencies) / elapsed:8.0f} queries/s',
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--provider-concurrency', type=int, default=8)
+    parser.add_argument('--window-ms', type=float, default=5.0)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    provider = SimulatedProvider(args.latency_ms, args.provider_concurrency)
+    await run('unbatched', provider, provider, args)
+
+    provider = SimulatedProvider(args.latency_ms, args.provider_concurrency)
+    batcher = BatchedQueryEmbeddings(
+        provider,
+        window_ms=args.window_ms,
+        max_batch_size=args.max_batch_size,
+    )
+    await run('batched', batcher, provider, args)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+# Compares retrieval latency of vector-only and hybrid (full-text + vector
+# with reciprocal rank fusion) search against the documents of one
+# collection stored in DATABASE_URL. Queries are sampled from that
+# collection's chunks: the first words of a chunk become the question and
+# its embedding the query vector, so no embedding API calls are made.
+#
+#   python -m benchmarks.bench_retrieval --queries 200 --collection default
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core import settings
+from app.db import AsyncSessionLocal
+from app.db import apply_search_params
+from app.db import DEFAULT_COLLECTION
+from app.graph.retrieval import hybrid_search
+from app.graph.retrieval import vector_search
+
+
+async def sample_queries(
+    count: int, collection: str = DEFAULT_COLLECTION,
+) -> list[tuple[str, list[float]]]:
+    # Drawn from the searched collection only; a query taken from another
+    # collection could never find its own chunk.
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text(
+                'SELECT content, embedding::text AS embedding FROM documents '
+                'WHERE collection = :collection AND embedding IS NOT NULL '
+                'ORDER BY random() LIMIT :count',
+            ),
+            {'count': count, 'collection': collection},
+        )
+        return [
+            (' '.join(row.content.split()[:6]), json.loads(row.embedding))
+            for row in result
+        ]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def run(name: str, search, queries) -> None:
+    latencies = []
+    async with AsyncSessionLocal() as db:
+        for question, embedding in queries:
+            start = time.perf_counter()
+            await apply_search_params(db)
+            await search(db, question, embedding)
+            await db.rollback()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    print(
+        f'{name:<8} n={len(latencies):<5} '
+        f'mean={statistics.mean(latencies):7.2f}ms '
+        f'p50={percentile(latencies, 0.50):7.2f}ms '
+        f'p95={percentile(latencies, 0.95):7.2f}ms '
+        f'p99={percentile(latencies, 0.99):7.2f}ms',
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=settings.RETRIEVAL_TOP_K)
+    parser.add_argument('--collection', default=DEFAULT_COLLECTION)
+    args = parser.parse_args()
+
+    queries = await sample_queries(args.queries, args.collection)
+    if not queries:
+        print(
+            f'No documents with embeddings in {args.collection!r}; '
+            'ingest some first.',
+        )
+        return
+
+    async def vector(db, question, embedding):
+        return await vector_search(
+            db, embedding, args.top_k, collection=args.collection,
+        )
+
+    async def hybrid(db, question, embedding):
+        return await hybrid_search(
+            db, question, embedding, args.top_k, collection=args.collection,
+        )
+
+    # Warm up caches and connections before measuring.
+    await run('warmup', vector, queries[:10])
+    await run('vector', vector, queries)
+    await run('hybrid', hybrid, queries)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
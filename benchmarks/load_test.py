@@ -0,0 +1,203 @@
+# Load test for a running API. Seeds the knowledge base from sample_doc.txt,
+# then drives /chat, /knowledge/update and /knowledge at a fixed concurrency
+# and reports latency percentiles, time to first token (chat) and
+# throughput. Start the server with the local stand-in providers to measure
+# the service itself without spending Gemini quota:
+#
+#   EMBEDDING_PROVIDER=fake LLM_PROVIDER=fake uvicorn app.main:app
+#   python -m benchmarks.load_test --concurrency 16 --requests 200
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import re
+import statistics
+import time
+from dataclasses import dataclass
+from dataclasses import field
+
+import httpx
+
+SEED_SOURCE_ID = 'loadtest-seed'
+INGEST_SOURCES = 50
+
+
+@dataclass
+class Result:
+    latencies: list[float] = field(default_factory=list)
+    ttfts: list[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def load_corpus(path: str) -> tuple[str, list[str], list[str]]:
+    with open(path, encoding='utf-8') as f:
+        corpus = f.read()
+    paragraphs = [p.strip() for p in corpus.split('\n\n') if len(p) > 200]
+    sentences = [
+        s.strip() for s in re.split(r'(?<=[.?!])\s+', corpus)
+        if len(s.split()) >= 6
+    ]
+    questions = [' '.join(s.split()[:8]) + '?' for s in sentences]
+    return corpus, paragraphs, questions
+
+
+async def chat(client: httpx.AsyncClient, args, questions, i, result):
+    payload = {
+        'question': random.choice(questions),
+        'history': [],
+        'bypass_cache': not args.use_cache,
+    }
+    if args.retrieval_mode:
+        payload['retrieval_mode'] = args.retrieval_mode
+
+    start = time.perf_counter()
+    async with client.stream('POST', '/chat', json=payload) as response:
+        response.raise_for_status()
+        first_token = None
+        async for chunk in response.aiter_text():
+            if chunk and first_token is None:
+                first_token = time.perf_counter()
+    end = time.perf_counter()
+
+    result.latencies.append((end - start) * 1000)
+    if first_token is not None:
+        result.ttfts.append((first_token - start) * 1000)
+
+
+async def ingest(client: httpx.AsyncClient, args, paragraphs, i, result):
+    # Sources are reused round-robin so repeated runs replace earlier chunks
+    # instead of growing the table without bound.
+    content = f'{random.choice(paragraphs)}\n\nload test run {time.time()}'
+    start = time.perf_counter()
+    response = await client.post(
+        '/knowledge/update',
+        json={
+            'documents': [{
+                'source_id': f'loadtest-{i % INGEST_SOURCES}',
+                'content': content,
+                'metadata': {'source': 'load_test'},
+            }],
+        },
+    )
+    response.raise_for_status()
+    result.latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def list_documents(client: httpx.AsyncClient, args, _, i, result):
+    start = time.perf_counter()
+    response = await client.get('/knowledge', params={'limit': 50})
+    response.raise_for_status()
+    result.latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, args, request, data,
+) -> Result:
+    result = Result()
+    counter = iter(range(args.requests))
+
+    async def worker():
+        for i in counter:
+            try:
+                await request(client, args, data, i, result)
+            except httpx.HTTPError as e:
+                result.errors += 1
+                if result.errors <= 3:
+                    print(f'  request failed: {e!r}')
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def report(name: str, result: Result) -> None:
+    if not result.latencies:
+        print(f'{name:<8} no successful requests ({result.errors} errors)')
+        return
+
+    print(
+        f'{name:<8} n={len(result.latencies):<5} errors={result.errors:<4} '
+        f'throughput={len(result.latencies) / result.elapsed:7.2f} req/s '
+        f'mean={statistics.mean(result.latencies):8.2f}ms '
+        f'p50={percentile(result.latencies, 0.50):8.2f}ms '
+        f'p95={percentile(result.latencies, 0.95):8.2f}ms '
+        f'p99={percentile(result.latencies, 0.99):8.2f}ms',
+    )
+    if result.ttfts:
+        print(
+            f'{"":<8} ttft '
+            f'p50={percentile(result.ttfts, 0.50):8.2f}ms '
+            f'p95={percentile(result.ttfts, 0.95):8.2f}ms '
+            f'p99={percentile(result.ttfts, 0.99):8.2f}ms',
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--corpus', default='sample_doc.txt')
+    parser.add_argument(
+        '--scenarios', default='chat,ingest,list',
+        help='comma separated subset of chat, ingest and list',
+    )
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument(
+        '--retrieval-mode', choices=['vector', 'hybrid'], default=None,
+    )
+    parser.add_argument(
+        '--use-cache', action='store_true',
+        help='let /chat answer from the semantic cache',
+    )
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    corpus, paragraphs, questions = load_corpus(args.corpus)
+    scenarios = {
+        'chat': (chat, questions),
+        'ingest': (ingest, paragraphs),
+        'list': (list_documents, None),
+    }
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, timeout=args.timeout, limits=limits,
+    ) as client:
+        if not args.skip_seed:
+            start = time.perf_counter()
+            response = await client.post(
+                '/knowledge/update',
+                json={
+                    'documents': [{
+                        'source_id': SEED_SOURCE_ID,
+                        'content': corpus,
+                        'metadata': {'source': 'sample_doc.txt'},
+                    }],
+                },
+            )
+            response.raise_for_status()
+            print(
+                f'seeded corpus in {time.perf_counter() - start:.2f}s: '
+                f'{response.json()["detail"]}',
+            )
+
+        print(
+            f'concurrency={args.concurrency} requests={args.requests} '
+            f'per scenario',
+        )
+        for name in args.scenarios.split(','):
+            request, data = scenarios[name.strip()]
+            report(name, await run_scenario(client, args, request, data))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())